@@ -0,0 +1,165 @@
+"""
+The autopilot module contains a sample planner that steers the player of the
+Turtle's Adventure game by simulating candidate paths ahead of time.
+"""
+import math
+import time
+from typing import Iterator, Optional, TYPE_CHECKING
+from simulation import GameState, Point, WON, LOST
+
+if TYPE_CHECKING:
+    from turtle_adventure import TurtleAdventureGame
+
+
+class WaypointPlanner:
+    """
+    Pick the next waypoint for the player by rolling out a set of candidate
+    paths and scoring where each of them ends up.  Every candidate path walks
+    to a point around the player first and heads home halfway through the
+    horizon.  Rollouts separate crowding enemies only every
+    separation_interval ticks, which is rough but far cheaper.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(self,
+                 horizon: int = 60,
+                 directions: int = 12,
+                 radii: tuple[float, ...] = (40, 100),
+                 safe_distance: float = 30,
+                 separation_interval: int = 4):
+        self.horizon: int = horizon
+        self.directions: int = directions
+        self.radii: tuple[float, ...] = radii
+        self.safe_distance: float = safe_distance
+        self.separation_interval: int = separation_interval
+
+    def candidates(self, state: GameState) -> list[Point]:
+        """
+        Return the first waypoints of all candidate paths
+        """
+        arena = state.arena
+        px, py = state.player
+        points = [(arena.home_x, arena.home_y)]
+        for i in range(self.directions):
+            angle = 2 * math.pi * i / self.directions
+            for radius in self.radii:
+                x = min(max(px + radius * math.cos(angle), 0), arena.width)
+                y = min(max(py + radius * math.sin(angle), 0), arena.height)
+                points.append((x, y))
+        return points
+
+    def score(self, rollout: GameState) -> float:
+        """
+        Score the final state of a rollout, higher is better
+        """
+        if rollout.status == WON:
+            return 1e6 - rollout.tick
+        if rollout.status == LOST:
+            return -1e6 + rollout.tick
+        px, py = rollout.player
+        arena = rollout.arena
+        score = -math.hypot(arena.home_x - px, arena.home_y - py)
+        clearance = rollout.nearest_enemy_distance()
+        if clearance < self.safe_distance:
+            score -= (self.safe_distance - clearance) * 10
+        return score
+
+    def search(self, state: GameState) -> Iterator[Point]:
+        """
+        Roll out the candidate paths one by one, yielding the best waypoint
+        found so far after each rollout, so that a search can be spread over
+        several callbacks
+        """
+        home = (state.arena.home_x, state.arena.home_y)
+        best, best_score = home, -math.inf
+        state = state.clone()
+        state.separation_interval = self.separation_interval
+        for point in self.candidates(state):
+            rollout = state.simulate(self.horizon,
+                                     {0: point, self.horizon // 2: home})
+            score = self.score(rollout)
+            if score > best_score:
+                best, best_score = point, score
+            yield best
+
+    def plan(self, state: GameState) -> Point:
+        """
+        Return the waypoint the player should walk to next
+        """
+        best = (state.arena.home_x, state.arena.home_y)
+        for best in self.search(state):
+            pass
+        return best
+
+
+class Autopilot:
+    """
+    Periodically replan and set the waypoint of a running game.
+
+    A search rolls out many candidate paths, which takes far longer than a
+    tick, so it is spread over several callbacks that each spend at most
+    budget seconds on rollouts and let Tk handle input and ticks in between.
+    The search plans against a snapshot of the game taken when it started.
+    """
+
+    def __init__(self,
+                 game: "TurtleAdventureGame",
+                 planner: Optional[WaypointPlanner] = None,
+                 interval: int = 200,
+                 budget: float = 0.01):
+        self.__game: "TurtleAdventureGame" = game
+        self.__planner: WaypointPlanner = (planner if planner is not None
+                                           else WaypointPlanner())
+        self.__interval: int = interval
+        self.__budget: float = budget
+        self.__running: bool = False
+        self.__search: Optional[Iterator[Point]] = None
+        self.__best: Optional[Point] = None
+
+    @property
+    def planner(self) -> WaypointPlanner:
+        """
+        Get the planner used to choose waypoints
+        """
+        return self.__planner
+
+    @property
+    def is_running(self) -> bool:
+        """
+        Get the flag indicating whether the autopilot is steering
+        """
+        return self.__running and self.__game.is_started
+
+    def start(self) -> None:
+        """
+        Start steering the player as soon as the game runs.  The autopilot
+        stops by itself when the game stops.
+        """
+        if not self.__running:
+            self.__running = True
+            self.__game.schedule(0, self.__tick)
+
+    def stop(self) -> None:
+        """
+        Stop steering the player
+        """
+        self.__running = False
+        self.__search = None
+
+    def __tick(self) -> None:
+        if not self.__running:
+            return
+        if self.__search is None:
+            self.__search = self.__planner.search(
+                GameState.from_game(self.__game))
+        deadline = time.perf_counter() + self.__budget
+        for best in self.__search:
+            self.__best = best
+            if time.perf_counter() >= deadline:
+                # continue once Tk has caught up with input and ticks
+                self.__game.schedule(0, self.__tick)
+                return
+        self.__search = None
+        if self.__best is not None:
+            self.__game.waypoint.activate(*self.__best)
+        self.__game.schedule(self.__interval, self.__tick)
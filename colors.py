@@ -0,0 +1,53 @@
+"""
+The colors module resolves Tk color specifications, i.e., color names and
+hexadecimal #RGB strings, into RGB triples without Tk, e.g., to validate the
+colors of enemy definitions or to draw frames without a display.
+
+The color names are those Tk 8.6 knows on every platform and are kept in
+colors.json.  They follow the X11 color database, except that green, maroon
+and purple take the web colors' values as they do in Tk 8.6.  Like Tk, names
+are matched ignoring case and spaces.
+"""
+import json
+import os
+from functools import lru_cache
+
+DEFAULT_COLOR_TABLE = os.path.join(os.path.dirname(__file__), "colors.json")
+
+
+@lru_cache(maxsize=None)
+def load_color_table(path: str = DEFAULT_COLOR_TABLE
+                     ) -> dict[str, tuple[int, int, int]]:
+    """
+    Load the table of color names from a JSON file mapping lower-case names
+    without spaces to #RRGGBB strings.  Results are cached per path.
+    """
+    with open(path, encoding="utf-8") as file:
+        table = json.load(file)
+    return {name: _parse_hex(name, value) for name, value in table.items()}
+
+
+def _parse_hex(color: str, digits: str) -> tuple[int, int, int]:
+    digits = digits[1:]
+    width = len(digits) // 3
+    if (not 1 <= width <= 4 or len(digits) != 3 * width
+            or any(digit not in "0123456789abcdefABCDEF" for digit in digits)):
+        raise ValueError(f"unknown color {color!r}")
+    # like X11, scale every component to 16 bits by shifting, not by
+    # replicating digits, then keep the upper 8 bits
+    return tuple(int(digits[i:i + width], 16) << (16 - 4 * width) >> 8
+                 for i in range(0, len(digits), width))
+
+
+def parse_color(color: str) -> tuple[int, int, int]:
+    """
+    Convert a Tk color name or a #RGB, #RRGGBB, #RRRGGGBBB or #RRRRGGGGBBBB
+    string into an RGB triple with 8 bits per component.  Raise ValueError
+    for colors that Tk would reject.
+    """
+    if color.startswith("#"):
+        return _parse_hex(color, color)
+    rgb = load_color_table().get(color.replace(" ", "").lower())
+    if rgb is None:
+        raise ValueError(f"unknown color {color!r}")
+    return rgb
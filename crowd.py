@@ -0,0 +1,123 @@
+"""
+The crowd module keeps enemies of the Turtle's Adventure game from piling up
+on top of each other.  Neighbors are found through a uniform cell grid that is
+updated incrementally as enemies move, so a tick costs time proportional to
+the number of enemies rather than to its square, as long as they do not pile
+up: bodies sharing a neighborhood are still compared pair by pair.
+"""
+import math
+from typing import Iterable, Sequence
+
+# half of the 3x3 neighborhood, so that every pair of cells is visited once
+_NEIGHBOR_CELLS = ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1))
+
+
+class CrowdGrid:
+    """
+    Compute separation offsets for a set of square bodies whose positions are
+    given as parallel sequences indexed by a stable body number.  Bodies may
+    be appended between calls but are never removed.
+    """
+
+    def __init__(self, cell_size: float, padding: float = 2,
+                 strength: float = 0.5):
+        self.__cell_size: float = cell_size
+        self.__padding: float = padding
+        self.__strength: float = strength
+        self.__keys: list = []
+        self.__cells: dict[tuple[int, int], list[int]] = {}
+
+    @property
+    def cell_size(self) -> float:
+        """
+        Get the edge length of a grid cell
+        """
+        return self.__cell_size
+
+    @property
+    def padding(self) -> float:
+        """
+        Get the gap kept free between the edges of neighboring bodies
+        """
+        return self.__padding
+
+    @property
+    def strength(self) -> float:
+        """
+        Get the fraction of an overlap that is resolved per call
+        """
+        return self.__strength
+
+    def __sync(self, xs: Sequence[float], ys: Sequence[float],
+               weights: Sequence[float]) -> None:
+        keys, cells, cell_size = self.__keys, self.__cells, self.__cell_size
+        if len(keys) > len(xs):
+            keys.clear()
+            cells.clear()
+        keys.extend([None] * (len(xs) - len(keys)))
+        for i, (x, y, weight) in enumerate(zip(xs, ys, weights)):
+            if weight <= 0:
+                continue
+            key = (int(x // cell_size), int(y // cell_size))
+            old = keys[i]
+            if key == old:
+                continue
+            if old is not None:
+                members = cells[old]
+                members.remove(i)
+                if not members:
+                    del cells[old]
+            cells.setdefault(key, []).append(i)
+            keys[i] = key
+
+    def separate(self, xs: Sequence[float], ys: Sequence[float],
+                 sizes: Sequence[float], weights: Sequence[float]
+                 ) -> tuple[list[float], list[float]]:
+        """
+        Return the x and y offsets that push overlapping bodies apart.
+        Bodies with zero weight are ignored; the others move in proportion to
+        their weight.
+        """
+        self.__sync(xs, ys, weights)
+        count = len(xs)
+        dxs = [0.0] * count
+        dys = [0.0] * count
+        cells = self.__cells
+        padding, strength = self.__padding, self.__strength
+        for (cx, cy), members in cells.items():
+            for ox, oy in _NEIGHBOR_CELLS:
+                same = ox == 0 and oy == 0
+                others = members if same else cells.get((cx + ox, cy + oy))
+                if not others:
+                    continue
+                for a, i in enumerate(members):
+                    xi, yi, si = xs[i], ys[i], sizes[i]
+                    for j in (others[a + 1:] if same else others):
+                        gap = (si + sizes[j]) / 2 + padding
+                        ddx = xi - xs[j]
+                        ddy = yi - ys[j]
+                        if abs(ddx) >= gap or abs(ddy) >= gap:
+                            continue
+                        distance = math.hypot(ddx, ddy)
+                        if distance:
+                            ux, uy = ddx / distance, ddy / distance
+                        else:
+                            # stacked exactly: split them along a fixed axis
+                            ux, uy = 1.0, 0.0
+                        push = (gap - distance) * strength / 2
+                        dxs[i] += ux * push * weights[i]
+                        dys[i] += uy * push * weights[i]
+                        dxs[j] -= ux * push * weights[j]
+                        dys[j] -= uy * push * weights[j]
+        return dxs, dys
+
+
+def make_crowd_grid(kinds: Iterable, padding: float = 2,
+                    strength: float = 0.5) -> CrowdGrid:
+    """
+    Create a CrowdGrid whose cells fit the largest enemy of all given enemy
+    kinds that take part in crowd separation
+    """
+    largest = max((max(kind.sizes) for kind in kinds if kind.separation > 0),
+                  default=0)
+    return CrowdGrid(max(largest + padding, 1), padding, strength)
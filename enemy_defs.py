@@ -0,0 +1,510 @@
+"""
+The enemy_defs module loads declarative enemy definitions from a JSON file and
+compiles them into dispatch tables and parameter tuples used by the enemies of
+the Turtle's Adventure game.
+
+Each definition describes an enemy's shape, size, color, movement behavior,
+state transitions, initial placement, spawn rules and how strongly the enemy
+keeps its distance from other enemies.  Behaviors operate on
+any object with x, y, state, target_x and target_y attributes, so they can be
+applied to live game elements as well as to plain state records.  Every
+behavior also comes as a batch version that advances all bodies of a kind at
+once, given as an object with xs, ys, states, target_xs, target_ys and sizes
+lists, e.g., to advance simulated games column by column.
+"""
+import json
+import os
+import random
+import tkinter as tk
+from functools import lru_cache
+from typing import Callable, NamedTuple, Optional, Union
+from colors import parse_color
+
+DEFAULT_DEFINITIONS = os.path.join(os.path.dirname(__file__), "enemies.json")
+
+# wall indices used by the bounce behavior's transition table
+LEFT, RIGHT, TOP, BOTTOM = range(4)
+
+Spawn = tuple[float, float, int]
+
+
+class Arena:
+    """
+    Hold the game-wide positions that enemy behaviors react to, so that
+    behaviors need not query the canvas or the player's turtle every tick.
+    """
+
+    __slots__ = ("width", "height", "home_x", "home_y",
+                 "player_x", "player_y", "rng")
+
+    def __init__(self,
+                 width: int,
+                 height: int,
+                 home: tuple[float, float],
+                 rng: Optional[random.Random] = None):
+        self.width: int = width
+        self.height: int = height
+        self.home_x, self.home_y = home
+        self.player_x: float = 0
+        self.player_y: float = 0
+        self.rng: random.Random = rng if rng is not None else random.Random()
+
+    def track_player(self, x: float, y: float) -> None:
+        """
+        Record the player's latest position
+        """
+        self.player_x = x
+        self.player_y = y
+
+
+class StateTable(NamedTuple):
+    """
+    Compiled state machine of an enemy kind.  All tuples are indexed by
+    state number.
+    """
+    names: tuple[str, ...]
+    dx: tuple[float, ...]
+    dy: tuple[float, ...]
+    # patrol: axis (0 for x, 1 for y) and home-relative coordinate at which
+    # the state hands over to the next one
+    axis: tuple[int, ...]
+    until: tuple[float, ...]
+    next: tuple[int, ...]
+    # bounce: states to continue with after hitting each wall
+    walls: tuple[tuple[tuple[int, ...], ...], ...]
+
+
+class SpawnRule(NamedTuple):
+    """
+    Compiled spawn rule.  Wave i appears delay * growth ** i milliseconds
+    after the game starts; repeat and wave_size are (base, per_level) pairs.
+    """
+    delay: int
+    growth: float
+    repeat: tuple[float, float]
+    wave_size: tuple[float, float]
+
+    def schedule(self, level: int) -> list[tuple[int, int]]:
+        """
+        Return (delay, count) pairs of all waves for the given level
+        """
+        repeat = int(self.repeat[0] + self.repeat[1] * level)
+        count = int(self.wave_size[0] + self.wave_size[1] * level)
+        if count <= 0:
+            return []
+        return [(int(self.delay * self.growth ** wave), count)
+                for wave in range(repeat)]
+
+
+class EnemyKind(NamedTuple):
+    """
+    A compiled enemy definition
+    """
+    kind_id: int
+    name: str
+    shape: str
+    create_item: Callable[..., int]
+    sizes: tuple[int, ...]
+    color: str
+    outline: str
+    behavior: Callable[..., Optional[list[Spawn]]]
+    # advances all bodies of this kind stored in columns, see Behavior
+    batch_behavior: Callable[..., None]
+    params: tuple
+    states: Optional[StateTable]
+    initial_state: int
+    placement: Callable[..., tuple[float, float]]
+    placement_params: tuple
+    spawn: tuple[SpawnRule, ...]
+    # how strongly enemies of this kind are pushed away from crowding
+    # enemies, 0 to ignore crowds entirely
+    separation: float
+    # whether the behavior heads for a target that is drawn on spawning
+    uses_target: bool
+
+    def pick_state(self, rng: random.Random) -> int:
+        """
+        Return the state a newly spawned enemy of this kind starts in
+        """
+        if self.initial_state >= 0 or self.states is None:
+            return max(self.initial_state, 0)
+        return rng.randrange(len(self.states.names))
+
+    def pick_target(self, arena: Arena) -> tuple[float, float]:
+        """
+        Return the first target of a newly spawned enemy of this kind.  Kinds
+        whose behavior uses no target draw nothing from the arena's random
+        generator.
+        """
+        if not self.uses_target:
+            return 0, 0
+        return (arena.rng.randint(0, arena.width),
+                arena.rng.randint(0, arena.height))
+
+    def place(self, arena: Arena) -> tuple[float, float]:
+        """
+        Return the initial position of a newly spawned enemy of this kind
+        """
+        return self.placement(arena, *self.placement_params)
+
+    def schedule(self, level: int) -> list[tuple[int, int]]:
+        """
+        Return (delay, count) pairs of all spawn waves for the given level,
+        ordered by delay
+        """
+        waves = [wave for rule in self.spawn for wave in rule.schedule(level)]
+        waves.sort(key=lambda wave: wave[0])
+        return waves
+
+
+def _approach(value: float, target: float, step: float) -> float:
+    if value < target:
+        return min(value + step, target)
+    if value > target:
+        return max(value - step, target)
+    return value
+
+
+def _wander(body, kind: EnemyKind, arena: Arena) -> Optional[list[Spawn]]:
+    (speed,) = kind.params
+    body.x = _approach(body.x, body.target_x, speed)
+    body.y = _approach(body.y, body.target_y, speed)
+    if body.x == body.target_x and body.y == body.target_y:
+        body.target_x = arena.rng.randint(0, arena.width)
+        body.target_y = arena.rng.randint(0, arena.height)
+    return None
+
+
+def _wander_batch(bodies, kind: EnemyKind, arena: Arena) -> None:
+    (speed,) = kind.params
+    bodies.xs = [min(x + speed, target) if x < target
+                 else max(x - speed, target) if x > target else x
+                 for x, target in zip(bodies.xs, bodies.target_xs)]
+    bodies.ys = [min(y + speed, target) if y < target
+                 else max(y - speed, target) if y > target else y
+                 for y, target in zip(bodies.ys, bodies.target_ys)]
+    target_xs, target_ys = bodies.target_xs, bodies.target_ys
+    arrived = [i for i, (x, y, target_x, target_y)
+               in enumerate(zip(bodies.xs, bodies.ys, target_xs, target_ys))
+               if x == target_x and y == target_y]
+    # same draws in the same order as stepping the bodies one by one
+    for i in arrived:
+        target_xs[i] = arena.rng.randint(0, arena.width)
+        target_ys[i] = arena.rng.randint(0, arena.height)
+
+
+def _chase(body, kind: EnemyKind, arena: Arena) -> Optional[list[Spawn]]:
+    near, near_speed, far_speed = kind.params
+    dx = arena.player_x - body.x
+    dy = arena.player_y - body.y
+    if dx:
+        speed = far_speed if abs(dx) > near else near_speed
+        body.x += speed if dx > 0 else -speed
+    if dy:
+        speed = far_speed if abs(dy) > near else near_speed
+        body.y += speed if dy > 0 else -speed
+    return None
+
+
+def _chase_batch(bodies, kind: EnemyKind, arena: Arena) -> None:
+    near, near_speed, far_speed = kind.params
+    px, py = arena.player_x, arena.player_y
+    bodies.xs = [x if not (dx := px - x)
+                 else x + (far_speed if dx > near else near_speed) if dx > 0
+                 else x - (far_speed if -dx > near else near_speed)
+                 for x in bodies.xs]
+    bodies.ys = [y if not (dy := py - y)
+                 else y + (far_speed if dy > near else near_speed) if dy > 0
+                 else y - (far_speed if -dy > near else near_speed)
+                 for y in bodies.ys]
+
+
+def _patrol(body, kind: EnemyKind, arena: Arena) -> Optional[list[Spawn]]:
+    (speed,) = kind.params
+    table = kind.states
+    state = body.state
+    if table.axis[state] == 0:
+        reached = body.x == arena.home_x + table.until[state]
+    else:
+        reached = body.y == arena.home_y + table.until[state]
+    if reached:
+        body.state = table.next[state]
+    # the step of the current tick still follows the old direction
+    body.x += table.dx[state] * speed
+    body.y += table.dy[state] * speed
+    return None
+
+
+def _patrol_batch(bodies, kind: EnemyKind, arena: Arena) -> None:
+    (speed,) = kind.params
+    table = kind.states
+    xs, ys, states = bodies.xs, bodies.ys, bodies.states
+    for i, state in enumerate(states):
+        if table.axis[state] == 0:
+            reached = xs[i] == arena.home_x + table.until[state]
+        else:
+            reached = ys[i] == arena.home_y + table.until[state]
+        if reached:
+            states[i] = table.next[state]
+        xs[i] += table.dx[state] * speed
+        ys[i] += table.dy[state] * speed
+
+
+def _bounce(body, kind: EnemyKind, arena: Arena) -> Optional[list[Spawn]]:
+    speed, _ = kind.params
+    table = kind.states
+    state = body.state
+    x = body.x + table.dx[state] * speed
+    y = body.y + table.dy[state] * speed
+    if x <= 0:
+        wall, x = LEFT, 1
+    elif x >= arena.width:
+        wall, x = RIGHT, arena.width - 1
+    elif y <= 0:
+        wall, y = TOP, 1
+    elif y >= arena.height:
+        wall, y = BOTTOM, arena.height - 1
+    else:
+        body.x = x
+        body.y = y
+        return None
+    # the body itself continues with the first outgoing state, any further
+    # states are spawned as copies
+    first, *rest = table.walls[state][wall]
+    body.x = x
+    body.y = y
+    body.state = first
+    return [(x, y, other) for other in rest]
+
+
+def _bounce_batch(bodies, kind: EnemyKind, arena: Arena) -> None:
+    speed, _ = kind.params
+    table = kind.states
+    width, height = arena.width, arena.height
+    xs, ys, states, sizes = bodies.xs, bodies.ys, bodies.states, bodies.sizes
+    start = 0
+    # bodies split off by a bounce are appended and move in the same tick,
+    # like in the live game
+    while start < len(xs):
+        end = len(xs)
+        xs[start:] = [x + table.dx[state] * speed
+                      for x, state in zip(xs[start:], states[start:])]
+        ys[start:] = [y + table.dy[state] * speed
+                      for y, state in zip(ys[start:], states[start:])]
+        for i in range(start, end):
+            x, y = xs[i], ys[i]
+            if 0 < x < width and 0 < y < height:
+                continue
+            if x <= 0:
+                wall, x = LEFT, 1
+            elif x >= width:
+                wall, x = RIGHT, width - 1
+            elif y <= 0:
+                wall, y = TOP, 1
+            else:
+                wall, y = BOTTOM, height - 1
+            first, *rest = table.walls[states[i]][wall]
+            xs[i], ys[i], states[i] = x, y, first
+            for other in rest:
+                xs.append(x)
+                ys.append(y)
+                states.append(other)
+                sizes.append(sizes[i])
+                bodies.target_xs.append(0)
+                bodies.target_ys.append(0)
+        start = end
+
+
+def _place_away_from_player(arena: Arena,
+                            margin: float) -> tuple[float, float]:
+    rng = arena.rng
+    for _ in range(1000):
+        x = rng.randint(0, arena.width)
+        y = rng.randint(0, arena.height)
+        if (abs(x - arena.player_x) >= margin
+                and abs(y - arena.player_y) >= margin):
+            break
+    return x, y
+
+
+def _place_near_home(arena: Arena, dx: float, dy: float) -> tuple[float, float]:
+    return arena.home_x + dx, arena.home_y + dy
+
+
+class Behavior(NamedTuple):
+    """
+    A movement behavior of enemies
+    """
+    # advances a single body and returns (x, y, state) of bodies to spawn
+    step: Callable[..., Optional[list[Spawn]]]
+    # advances all bodies of a kind stored in columns the same way, appending
+    # spawned bodies to the columns
+    batch: Callable[..., None]
+    # parameter names with defaults
+    defaults: dict[str, object]
+    needs_states: bool
+    # whether bodies head for a target that is drawn on spawning
+    uses_target: bool
+
+
+BEHAVIORS: dict[str, Behavior] = {
+    "wander": Behavior(_wander, _wander_batch, {"speed": 1}, False, True),
+    "chase": Behavior(_chase, _chase_batch,
+                      {"near_distance": 80, "near_speed": 2, "far_speed": 5},
+                      False, False),
+    "patrol": Behavior(_patrol, _patrol_batch, {"speed": 5}, True, False),
+    "bounce": Behavior(_bounce, _bounce_batch, {"speed": 3, "split": True},
+                       True, False),
+}
+
+PLACEMENTS: dict[str, tuple[Callable, dict[str, object]]] = {
+    "away_from_player": (_place_away_from_player, {"margin": 100}),
+    "near_home": (_place_near_home, {"dx": 0, "dy": 0}),
+}
+
+SHAPES: dict[str, Callable[..., int]] = {
+    "circle": tk.Canvas.create_oval,
+    "square": tk.Canvas.create_rectangle,
+}
+
+
+def _compile_params(name: str, given: dict, defaults: dict) -> tuple:
+    unknown = set(given) - set(defaults)
+    if unknown:
+        raise ValueError(f"{name}: unknown parameters {sorted(unknown)}")
+    return tuple(given.get(key, default) for key, default in defaults.items())
+
+
+def _compile_linear(name: str, value: Union[int, float, dict]
+                    ) -> tuple[float, float]:
+    if isinstance(value, dict):
+        return value.get("base", 0), value.get("per_level", 0)
+    if isinstance(value, (int, float)):
+        return value, 0
+    raise ValueError(f"{name}: expected a number or base/per_level, "
+                     f"got {value!r}")
+
+
+def _compile_walls(name: str, dx: tuple, dy: tuple,
+                   split: bool) -> tuple[tuple[tuple[int, ...], ...], ...]:
+    index = {(sx, sy): i for i, (sx, sy) in enumerate(zip(dx, dy))}
+
+    def lookup(vx, vy):
+        if (vx, vy) not in index:
+            raise ValueError(f"{name}: no state moving by ({vx}, {vy}) "
+                             f"to bounce into")
+        return index[(vx, vy)]
+
+    walls = []
+    for sx, sy in zip(dx, dy):
+        tangent_x = (-abs(sx), abs(sx)) if split else (sx,)
+        tangent_y = (-abs(sy), abs(sy)) if split else (sy,)
+        walls.append((
+            tuple(lookup(abs(sx), ty) for ty in tangent_y),   # LEFT
+            tuple(lookup(-abs(sx), ty) for ty in tangent_y),  # RIGHT
+            tuple(lookup(tx, abs(sy)) for tx in tangent_x),   # TOP
+            tuple(lookup(tx, -abs(sy)) for tx in tangent_x),  # BOTTOM
+        ))
+    return tuple(walls)
+
+
+def _compile_states(name: str, states: list, behavior: str,
+                    params: tuple) -> StateTable:
+    if not states:
+        raise ValueError(f"{name}: behavior {behavior!r} requires states")
+    names = tuple(state["name"] for state in states)
+    numbers = {state_name: i for i, state_name in enumerate(names)}
+    dx = tuple(state.get("dx", 0) for state in states)
+    dy = tuple(state.get("dy", 0) for state in states)
+    axis, until, nxt = [], [], []
+    for state in states:
+        target = state.get("until", {})
+        axis.append(1 if "y" in target else 0)
+        until.append(target.get("y", target.get("x", 0)))
+        next_name = state.get("next", state["name"])
+        if next_name not in numbers:
+            raise ValueError(f"{name}: unknown next state {next_name!r}")
+        nxt.append(numbers[next_name])
+    walls = ()
+    if behavior == "bounce":
+        walls = _compile_walls(name, dx, dy, bool(params[1]))
+    return StateTable(names, dx, dy, tuple(axis), tuple(until), tuple(nxt),
+                      walls)
+
+
+def compile_definition(kind_id: int, name: str, spec: dict) -> EnemyKind:
+    """
+    Compile a single enemy definition into an EnemyKind
+    """
+    if spec.get("shape", "circle") not in SHAPES:
+        raise ValueError(f"{name}: unknown shape {spec.get('shape')!r}")
+    if spec.get("behavior") not in BEHAVIORS:
+        raise ValueError(f"{name}: unknown behavior {spec.get('behavior')!r}")
+    behavior = BEHAVIORS[spec["behavior"]]
+    params = _compile_params(name, spec.get("params", {}), behavior.defaults)
+
+    states = None
+    initial_state = 0
+    if behavior.needs_states:
+        states = _compile_states(name, spec.get("states", []),
+                                 spec["behavior"], params)
+        initial = spec.get("initial_state", states.names[0])
+        if initial == "random":
+            initial_state = -1
+        elif initial in states.names:
+            initial_state = states.names.index(initial)
+        else:
+            raise ValueError(f"{name}: unknown initial state {initial!r}")
+
+    placement_spec = dict(spec.get("placement", {"type": "away_from_player"}))
+    placement_type = placement_spec.pop("type", None)
+    if placement_type not in PLACEMENTS:
+        raise ValueError(f"{name}: unknown placement {placement_type!r}")
+    placement, placement_defaults = PLACEMENTS[placement_type]
+
+    for key in ("color", "outline"):
+        try:
+            parse_color(spec.get(key, "black"))
+        except ValueError as error:
+            raise ValueError(f"{name}: {error}") from error
+
+    sizes = spec.get("size", [20])
+    return EnemyKind(
+        kind_id=kind_id,
+        name=name,
+        shape=spec.get("shape", "circle"),
+        create_item=SHAPES[spec.get("shape", "circle")],
+        sizes=tuple(sizes) if isinstance(sizes, list) else (sizes,),
+        color=spec.get("color", "black"),
+        outline=spec.get("outline", "black"),
+        behavior=behavior.step,
+        batch_behavior=behavior.batch,
+        params=params,
+        states=states,
+        initial_state=initial_state,
+        placement=placement,
+        placement_params=_compile_params(name, placement_spec,
+                                         placement_defaults),
+        spawn=tuple(
+            SpawnRule(delay=rule.get("delay", 0),
+                      growth=rule.get("growth", 1),
+                      repeat=_compile_linear(name, rule.get("repeat", 1)),
+                      wave_size=_compile_linear(name,
+                                                rule.get("count", 1)))
+            for rule in spec.get("spawn", [])),
+        separation=spec.get("separation", 0),
+        uses_target=behavior.uses_target,
+    )
+
+
+@lru_cache(maxsize=None)
+def load_enemy_kinds(path: str = DEFAULT_DEFINITIONS
+                     ) -> dict[str, EnemyKind]:
+    """
+    Load and compile all enemy definitions from a JSON file.  Results are
+    cached, so every file is only read once per process.
+    """
+    with open(path, encoding="utf-8") as file:
+        specs = json.load(file)
+    return {name: compile_definition(kind_id, name, spec)
+            for kind_id, (name, spec) in enumerate(specs.items())}
@@ -2,8 +2,15 @@
 The gamelib module defines abstract classes necessary for implementing simple
 games based on tkinter's canvas.
 """
+import time
 import tkinter as tk
 from abc import ABC, abstractmethod
+from typing import Any, Callable, Coroutine, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    # asyncio is slow to import and only needed by run_async(), so it is
+    # imported where it is used
+    import asyncio
 
 
 class GameElement(ABC):
@@ -77,6 +84,14 @@ class GameElement(ABC):
         Delete the corresponding game object, e.g., canvas item
         """
 
+    def canvas_items(self) -> tuple[int, ...]:
+        """
+        Return the ids of canvas items owned by this element.  Elements that
+        create canvas items should override this so that diagnostic tools can
+        tell their items apart from orphaned ones.
+        """
+        return ()
+
 
 class Game(tk.Frame, ABC): # pylint: disable=too-many-ancestors
     """
@@ -92,6 +107,11 @@ class Game(tk.Frame, ABC): # pylint: disable=too-many-ancestors
         self.__game_elements = []
         self.__update_delay = update_delay
         self.__started = False
+        self.__started_at: Optional[float] = None
+        self.__loop: Optional["asyncio.AbstractEventLoop"] = None
+        self.__tasks: set["asyncio.Task"] = set()
+        self.__after_ids: set[str] = set()
+        self.__deferred: list[tuple[int, Callable, tuple]] = []
         self.init_game()
 
     @abstractmethod
@@ -133,6 +153,20 @@ class Game(tk.Frame, ABC): # pylint: disable=too-many-ancestors
         """
         return self.__canvas
 
+    @property
+    def elements(self) -> tuple[GameElement, ...]:
+        """
+        Get a snapshot of all game elements currently registered in the game
+        """
+        return tuple(self.__game_elements)
+
+    @property
+    def update_delay(self) -> int:
+        """
+        Get the delay between two updates in milliseconds
+        """
+        return self.__update_delay
+
     @property
     def is_started(self) -> bool:
         """
@@ -140,26 +174,141 @@ class Game(tk.Frame, ABC): # pylint: disable=too-many-ancestors
         """
         return self.__started
 
-    def start(self) -> None:
+    @property
+    def started_at(self) -> Optional[float]:
+        """
+        Get the time.perf_counter() time at which the game was last started,
+        or None if it has not been started yet.  Delays given to schedule()
+        count from this time.
+        """
+        return self.__started_at
+
+    @property
+    def is_async(self) -> bool:
+        """
+        Get the flag indicating whether the game is driven by run_async()
+        """
+        return self.__loop is not None
+
+    def start(self, animate: bool = True) -> None:
         """
-        Start the game
+        Start the game.  With animate set to False the game does not tick by
+        itself, and whoever started it is expected to call tick() instead.
         """
         if not self.__started:
             self.__started = True
-            self.animate()
+            self.__started_at = time.perf_counter()
+            if animate and self.__loop is not None:
+                self.spawn_task(self.__tick_loop())
+            elif animate:
+                self.animate()
+            deferred, self.__deferred = self.__deferred, []
+            for delay, callback, args in deferred:
+                self.schedule(delay, callback, *args)
 
     def stop(self) -> None:
         """
-        Stop the game
+        Stop the game and cancel everything scheduled with schedule() or
+        spawn_task()
         """
         self.__started = False
+        self.__deferred.clear()
+        for after_id in self.__after_ids:
+            self.after_cancel(after_id)
+        self.__after_ids.clear()
+        for task in self.__tasks:
+            task.cancel()
 
-    def animate(self):
+    def schedule(self, delay: int, callback: Callable, *args) -> None:
         """
-        Update and render all game's elements
+        Call callback with args after delay milliseconds of game time.  The
+        call is deferred until the game starts and cancelled if the game
+        stops first.  When the game is driven by run_async(), the call is made
+        from a cancellable asyncio task, otherwise from Tk's after().
+        """
+        if not self.__started:
+            self.__deferred.append((delay, callback, args))
+        elif self.__loop is not None:
+            self.spawn_task(self.__call_later(delay, callback, args))
+        else:
+            after_id = ""
+
+            def fire():
+                self.__after_ids.discard(after_id)
+                callback(*args)
+            after_id = self.after(delay, fire)
+            self.__after_ids.add(after_id)
+
+    def spawn_task(self, coro: Coroutine[Any, Any, Any]) -> "asyncio.Task":
+        """
+        Run a coroutine as a task of this game.  The task is cancelled when
+        the game stops.  Only available while driven by run_async().
+        """
+        if self.__loop is None:
+            raise RuntimeError("tasks can only be spawned while the game is "
+                               "driven by run_async()")
+        task = self.__loop.create_task(coro)
+        self.__tasks.add(task)
+        task.add_done_callback(self.__tasks.discard)
+        return task
+
+    async def run_async(self, event_interval: float = 0.005) -> None:
+        """
+        Start the game and drive it from the running asyncio event loop
+        instead of Tk's mainloop.  Returns once the window has been destroyed.
+
+        Ticks and scheduled callbacks run on asyncio timers, but Tk offers no
+        way to wake the asyncio loop when window events arrive, so pending Tk
+        events are processed every event_interval seconds.  This adds up to
+        event_interval to input latency; telemetry.TimerProbe measures how
+        punctually timers fire compared with the after() driver.
+        """
+        import asyncio  # pylint: disable=import-outside-toplevel
+        self.__loop = asyncio.get_running_loop()
+        try:
+            self.start()
+            while True:
+                try:
+                    self.update()
+                except tk.TclError:
+                    # the application has been destroyed
+                    break
+                await asyncio.sleep(event_interval)
+        finally:
+            self.stop()
+            self.__loop = None
+
+    async def __tick_loop(self) -> None:
+        import asyncio  # pylint: disable=import-outside-toplevel
+        loop = asyncio.get_running_loop()
+        delay = self.__update_delay / 1000
+        deadline = loop.time()
+        while self.__started:
+            self.tick()
+            # aim at a fixed rate instead of a fixed pause after each tick,
+            # but skip missed ticks rather than catching up in a burst
+            deadline = max(deadline + delay, loop.time())
+            await asyncio.sleep(deadline - loop.time())
+
+    @staticmethod
+    async def __call_later(delay: int, callback: Callable,
+                           args: tuple) -> None:
+        import asyncio  # pylint: disable=import-outside-toplevel
+        await asyncio.sleep(delay / 1000)
+        callback(*args)
+
+    def tick(self) -> None:
+        """
+        Update and render all game's elements once
         """
         for element in self.__game_elements:
             element.update()
             element.render()
+
+    def animate(self):
+        """
+        Update and render all game's elements
+        """
+        self.tick()
         if self.__started:
             self.after(self.__update_delay, self.animate)
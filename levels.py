@@ -0,0 +1,275 @@
+"""
+The levels module compiles Turtle's Adventure levels ahead of time into level
+files and loads them back through a memory map.
+
+A level file holds everything the enemy generator would otherwise roll at
+runtime: the arena layout, the spawn schedule and the size, initial state,
+position and first target of every enemy, stored as packed little-endian
+arrays.  Compiling uses a seeded random.Random and fixed-width fields, so the
+same level number and seed give byte-identical files on every machine, and
+loading maps the file without parsing it, so even huge levels start at once.
+
+Enemy kinds are referred to by name and resolved against enemies.json when a
+level is loaded; their behaviors are code and are not stored in the file.
+
+Run ``python levels.py LEVEL SEED OUTPUT`` to compile a level file.
+"""
+import argparse
+import mmap
+import random
+import struct
+import sys
+from array import array
+from typing import Callable, Final, NamedTuple, Optional, Sequence
+from enemy_defs import Arena, EnemyKind, load_enemy_kinds
+
+MAGIC: Final = b"TALV"
+VERSION: Final = 2
+# longest spawn delay in milliseconds that fits a level file, about 49 days
+MAX_DELAY: Final = 2 ** 32 - 1
+# seeds are stored as unsigned 64-bit integers
+MAX_SEED: Final = 2 ** 64 - 1
+
+# magic, version, kind count, seed, seed of the random generator used while
+# playing, level, wave count, enemy count, size of the kind name table,
+# width, height, home x, home y, home size, player x, player y
+_HEADER = struct.Struct("<4sHHQQIIII2I5d")
+
+# (name, type code, whether the column has one entry per wave or per enemy),
+# in file order
+_COLUMNS: Final = (
+    ("wave_delays", "I", True),
+    ("wave_kinds", "I", True),
+    ("wave_counts", "I", True),
+    ("xs", "d", False),
+    ("ys", "d", False),
+    ("target_xs", "d", False),
+    ("target_ys", "d", False),
+    ("sizes", "I", False),
+    ("states", "I", False),
+)
+
+
+class Layout(NamedTuple):
+    """
+    Arena layout of a level
+    """
+    width: int
+    height: int
+    home_x: float
+    home_y: float
+    home_size: float
+    player_x: float
+    player_y: float
+
+
+def default_layout(width: int, height: int) -> Layout:
+    """
+    Return the layout used by levels that are not loaded from a level file
+    """
+    return Layout(width, height, width - 100, height // 2, 20, 50, height // 2)
+
+
+class CompiledLevel(NamedTuple):
+    """
+    A level loaded from a level file.  The columns are read-only views into
+    the mapped file; per-wave columns are indexed by wave number, per-enemy
+    columns by the order in which enemies spawn.
+    """
+    level: int
+    seed: int
+    # seeds the random generator that enemy behaviors draw from while the
+    # level is played, which must not replay the draws of the compiler
+    play_seed: int
+    layout: Layout
+    kinds: tuple[EnemyKind, ...]
+    wave_delays: Sequence[int]
+    wave_kinds: Sequence[int]
+    wave_counts: Sequence[int]
+    xs: Sequence[float]
+    ys: Sequence[float]
+    target_xs: Sequence[float]
+    target_ys: Sequence[float]
+    sizes: Sequence[int]
+    states: Sequence[int]
+    buffer: Optional[mmap.mmap]
+
+    @property
+    def wave_count(self) -> int:
+        """
+        Get the number of spawn waves
+        """
+        return len(self.wave_delays)
+
+    @property
+    def enemy_count(self) -> int:
+        """
+        Get the total number of enemies spawned over the level
+        """
+        return len(self.xs)
+
+    def make_arena(self) -> Arena:
+        """
+        Return an arena for this level whose random generator, which enemy
+        behaviors draw from, is seeded with the level's play seed
+        """
+        layout = self.layout
+        arena = Arena(layout.width, layout.height,
+                      (layout.home_x, layout.home_y),
+                      random.Random(self.play_seed))
+        arena.track_player(layout.player_x, layout.player_y)
+        return arena
+
+    def close(self) -> None:
+        """
+        Release the columns and unmap the level file
+        """
+        for name, _, _ in _COLUMNS:
+            column = getattr(self, name)
+            if isinstance(column, memoryview):
+                column.release()
+        if self.buffer is not None:
+            self.buffer.close()
+
+
+def _pad(size: int) -> int:
+    return -size % 8
+
+
+# pylint: disable=too-many-arguments,too-many-locals
+def compile_level(path: str, level: int, seed: int,
+                  layout: Layout,
+                  kinds: Optional[dict[str, EnemyKind]] = None) -> None:
+    """
+    Roll the spawn schedule and all enemies of a level with the given seed,
+    the same way EnemyGenerator does at runtime, and write them to a level
+    file.  Positions are rolled against the player's starting position.
+    The seed must fit into 64 bits without sign.
+    """
+    if not 0 <= seed <= MAX_SEED:
+        raise ValueError(f"seed {seed} is not between 0 and {MAX_SEED}")
+    kinds = kinds if kinds is not None else load_enemy_kinds()
+    rng = random.Random(seed)
+    # a separate stream for playing, taken before anything is rolled
+    play_seed = rng.getrandbits(64)
+    arena = Arena(layout.width, layout.height,
+                  (layout.home_x, layout.home_y), rng)
+    arena.track_player(layout.player_x, layout.player_y)
+    names = list(kinds)
+    # waves whose delays outgrow the delay field would never appear anyway
+    waves = [(delay, index, count)
+             for index, kind in enumerate(kinds.values())
+             for delay, count in kind.schedule(level)
+             if delay <= MAX_DELAY]
+    # stable, so waves due at the same time keep the definitions' order
+    waves.sort(key=lambda wave: wave[0])
+    columns = {name: array(code) for name, code, _ in _COLUMNS}
+    for delay, index, count in waves:
+        columns["wave_delays"].append(delay)
+        columns["wave_kinds"].append(index)
+        columns["wave_counts"].append(count)
+        kind = kinds[names[index]]
+        for _ in range(count):
+            # same draws in the same order as DefinedEnemy
+            columns["sizes"].append(rng.choice(kind.sizes))
+            columns["states"].append(kind.pick_state(rng))
+            target_x, target_y = kind.pick_target(arena)
+            columns["target_xs"].append(target_x)
+            columns["target_ys"].append(target_y)
+            x, y = kind.place(arena)
+            columns["xs"].append(x)
+            columns["ys"].append(y)
+    name_table = "\n".join(names).encode("utf-8")
+    header = _HEADER.pack(MAGIC, VERSION, len(names), seed, play_seed, level,
+                          len(waves), len(columns["xs"]), len(name_table),
+                          *layout)
+    with open(path, "wb") as file:
+        file.write(header)
+        file.write(name_table + bytes(_pad(len(name_table))))
+        for name, _, _ in _COLUMNS:
+            column = columns[name]
+            if sys.byteorder != "little":
+                column.byteswap()
+            data = column.tobytes()
+            file.write(data + bytes(_pad(len(data))))
+
+
+def load_level(path: str,
+               kinds: Optional[dict[str, EnemyKind]] = None
+               ) -> CompiledLevel:
+    """
+    Memory-map a level file.  Nothing beyond the header, the kind names and
+    the spawn schedule is read until the columns are accessed.  Raise
+    ValueError for files that are not consistent level files.
+    """
+    kinds = kinds if kinds is not None else load_enemy_kinds()
+    with open(path, "rb") as file:
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(buffer) < _HEADER.size:
+        buffer.close()
+        raise ValueError(f"{path}: not a level file")
+    (magic, version, kind_count, seed, play_seed, level, wave_count,
+     enemy_count, names_size, *layout) = _HEADER.unpack_from(buffer)
+    if magic != MAGIC or version != VERSION:
+        buffer.close()
+        raise ValueError(f"{path}: not a version {VERSION} level file")
+    offset = _HEADER.size
+    names = buffer[offset:offset + names_size].decode("utf-8").split("\n")
+    offset += names_size + _pad(names_size)
+    missing = [name for name in names[:kind_count] if name not in kinds]
+    if missing:
+        buffer.close()
+        raise ValueError(f"{path}: unknown enemy kinds {missing}")
+    sizes = [(wave_count if per_wave else enemy_count) * array(code).itemsize
+             for _, code, per_wave in _COLUMNS]
+    if offset + sum(size + _pad(size) for size in sizes) > len(buffer):
+        buffer.close()
+        raise ValueError(f"{path}: truncated level file")
+    view = memoryview(buffer)
+    columns = {}
+    for (name, code, _), size in zip(_COLUMNS, sizes):
+        if sys.byteorder == "little":
+            columns[name] = view[offset:offset + size].cast(code)
+        else:
+            column = array(code, view[offset:offset + size])
+            column.byteswap()
+            columns[name] = column
+        offset += size + _pad(size)
+    view.release()
+    # the spawn schedule is small, so check it now rather than failing in
+    # the middle of a game
+    if (any(index >= kind_count for index in columns["wave_kinds"])
+            or sum(columns["wave_counts"]) != enemy_count):
+        for column in columns.values():
+            if isinstance(column, memoryview):
+                column.release()
+        buffer.close()
+        raise ValueError(f"{path}: inconsistent spawn schedule")
+    return CompiledLevel(level, seed, play_seed, Layout(*layout),
+                         tuple(kinds[name] for name in names[:kind_count]),
+                         buffer=buffer, **columns)
+
+
+def _bounded_int(low: int, high: int) -> Callable[[str], int]:
+    def integer(text: str) -> int:
+        value = int(text)
+        if not low <= value <= high:
+            raise argparse.ArgumentTypeError(
+                f"{value} is not between {low} and {high}")
+        return value
+    return integer
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compile a Turtle's Adventure level file")
+    parser.add_argument("level", type=_bounded_int(0, 2 ** 32 - 1))
+    parser.add_argument("seed", type=_bounded_int(0, MAX_SEED))
+    parser.add_argument("output")
+    parser.add_argument("--width", type=_bounded_int(1, 2 ** 32 - 1),
+                        default=800)
+    parser.add_argument("--height", type=_bounded_int(1, 2 ** 32 - 1),
+                        default=500)
+    args = parser.parse_args()
+    compile_level(args.output, args.level, args.seed,
+                  default_layout(args.width, args.height))
@@ -2,21 +2,158 @@
 The main module, responsible for creating a root window containing the game's
 main component.
 """
-from typing import Final
+import time
+
+STARTED = time.perf_counter()
+
+# pylint: disable=wrong-import-position
+from typing import Callable, Final, Optional
+import argparse
 import tkinter as tk
 from turtle_adventure import TurtleAdventureGame
+from telemetry import LeakTelemetry, StartupProfiler, TimerProbe
+from autopilot import Autopilot
+from multigame import GameHost
+from levels import CompiledLevel, load_level
 
 SCREEN_WIDTH: Final = 800
 SCREEN_HEIGHT: Final = 500
 
-if __name__ == "__main__":
-    root = tk.Tk()
-    root.title("Turtle's Adventure")
-    root.attributes('-topmost', True)
-    root.geometry(f"{SCREEN_WIDTH}x{SCREEN_HEIGHT}")
+
+def attach_tools(game: TurtleAdventureGame, args: argparse.Namespace,
+                 name: str = "") -> list[Callable[[], None]]:
+    """
+    Attach the autopilot and the diagnostic tools selected on the command
+    line to a started game, and return functions that print their reports
+    once the game window has been closed
+    """
+    prefix = f"{name}: " if name else ""
+    reports: list[Callable[[], None]] = []
+    if args.telemetry:
+        telemetry = LeakTelemetry(
+            game, on_report=lambda report: print(prefix + report.summary()))
+        telemetry.start()
+    if args.autopilot:
+        Autopilot(game).start()
+    if args.latency:
+        reports.append(lambda: print(
+            game.input_latency.summary(prefix + "latency")))
+    if args.timer_jitter:
+        probe = TimerProbe(game)
+        probe.start()
+        reports.append(lambda: print(
+            probe.histogram.summary(prefix + "timer lateness")))
+    return reports
+
+
+def play(root: tk.Tk, args: argparse.Namespace,
+         compiled: Optional[CompiledLevel],
+         profiler: StartupProfiler) -> None:
+    """
+    Play a single game in the root window
+    """
+    width, height = SCREEN_WIDTH, SCREEN_HEIGHT
+    if compiled is not None:
+        width, height = compiled.layout.width, compiled.layout.height
+    root.geometry(f"{width}x{height}")
     root.resizable(False, False)  # games usually have fixed window size
+    profiler.mark("tk init")
+    # the player imports the turtle module while the game is constructed;
+    # import it up front so that its cost is reported as a phase of its own
+    # pylint: disable=import-outside-toplevel,unused-import
+    import turtle
+    profiler.mark("turtle import")
     # above Level 5 it is very hard
-    game = TurtleAdventureGame(root, SCREEN_WIDTH, SCREEN_HEIGHT, level=5)
-    game.start()
+    game = TurtleAdventureGame(root, width, height, level=5,
+                               immediate_input=not args.deferred_input,
+                               compiled_level=compiled)
+    profiler.mark("game construction")
+    if not args.asyncio:
+        game.start()
+        profiler.mark("first update")
+    if args.profile_startup:
+        profiler.mark_first_frame(root, lambda p: print(p.summary()))
     print(game.player.speed)
+    reports = attach_tools(game, args)
+    if args.asyncio:
+        import asyncio
+        asyncio.run(game.run_async())
+    else:
+        root.mainloop()
+    for report in reports:
+        report()
+
+
+def play_hosted(root: tk.Tk, args: argparse.Namespace,
+                compiled: Optional[CompiledLevel]) -> None:
+    """
+    Play several half-size games side by side under a shared scheduler
+    """
+    width, height = SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2
+    if compiled is not None:
+        width, height = compiled.layout.width, compiled.layout.height
+    host = GameHost(root, columns=2)
+    reports = []
+    for index in range(args.games):
+        game = host.add_canvas_game(width, height, level=5,
+                                    immediate_input=not args.deferred_input,
+                                    compiled_level=compiled)
+        reports += attach_tools(game, args, f"game {index}")
+    root.resizable(False, False)
+    host.start()
     root.mainloop()
+    for report in reports:
+        report()
+    for stats in host.stats():
+        print(stats)
+    print(host.aggregate())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Turtle's Adventure")
+    parser.add_argument("--telemetry", action="store_true",
+                        help="periodically report leaked canvas items and "
+                             "game objects")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="report how long each startup phase takes up to "
+                             "the first frame")
+    parser.add_argument("--autopilot", action="store_true",
+                        help="let a planner steer the turtle")
+    parser.add_argument("--latency", action="store_true",
+                        help="print a histogram of the latency from a click "
+                             "to the player being drawn at a new position "
+                             "on exit")
+    parser.add_argument("--deferred-input", action="store_true",
+                        help="let the player react to clicks on the next tick "
+                             "only, for comparison")
+    parser.add_argument("--asyncio", action="store_true",
+                        help="drive the game from an asyncio event loop "
+                             "instead of Tk's mainloop")
+    parser.add_argument("--timer-jitter", action="store_true",
+                        help="print a histogram of how late scheduled "
+                             "callbacks fire on exit, e.g., to compare with "
+                             "--asyncio")
+    parser.add_argument("--games", type=int, default=1,
+                        help="run this many half-size games side by side "
+                             "under a shared scheduler")
+    parser.add_argument("--level-file",
+                        help="play a level compiled with levels.py")
+    args = parser.parse_args()
+    if args.games < 1:
+        parser.error("--games must be at least 1")
+    if args.games > 1 and (args.asyncio or args.profile_startup):
+        parser.error("--asyncio and --profile-startup cannot be combined "
+                     "with --games, which runs its own scheduler")
+    profiler = StartupProfiler(origin=STARTED)
+    profiler.mark("imports")
+
+    level_file = load_level(args.level_file) if args.level_file else None
+    if level_file is not None:
+        profiler.mark("level loading")
+    root = tk.Tk()
+    root.title("Turtle's Adventure")
+    root.attributes('-topmost', True)
+    if args.games > 1:
+        play_hosted(root, args, level_file)
+    else:
+        play(root, args, level_file, profiler)
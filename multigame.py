@@ -0,0 +1,311 @@
+"""
+The multigame module runs several Turtle's Adventure games in one process
+under a single shared tick scheduler.  Each game either has its own canvas in
+a common window or runs headless as a simulation.
+"""
+import time
+import tkinter as tk
+from abc import ABC, abstractmethod
+from typing import NamedTuple, Optional
+from turtle_adventure import TurtleAdventureGame
+from simulation import GameState, Point, RUNNING
+from autopilot import WaypointPlanner
+from levels import CompiledLevel
+
+
+class InstanceStats(NamedTuple):
+    """
+    Throughput statistics of a single hosted game
+    """
+    name: str
+    ticks: int
+    ticks_per_second: float
+    mean_tick_ms: float
+    deferred_rounds: int
+
+
+class HostStats(NamedTuple):
+    """
+    Aggregate throughput statistics of a GameHost
+    """
+    rounds: int
+    overruns: int
+    ticks: int
+    ticks_per_second: float
+    busy_fraction: float
+
+
+class HostedInstance(ABC):
+    """
+    An abstract game instance run by a GameHost
+    """
+
+    def __init__(self, name: str):
+        self.name: str = name
+        self.ticks: int = 0
+        self.busy: float = 0.0
+        self.deferred_rounds: int = 0
+        self.owed: int = 0
+
+    @property
+    @abstractmethod
+    def is_running(self) -> bool:
+        """
+        Get the flag indicating whether the game still needs ticks
+        """
+
+    @abstractmethod
+    def tick(self) -> None:
+        """
+        Advance the game by one tick
+        """
+
+
+class CanvasInstance(HostedInstance):
+    """
+    A hosted TurtleAdventureGame drawing on its own canvas
+    """
+
+    def __init__(self, name: str, game: TurtleAdventureGame):
+        super().__init__(name)
+        self.game: TurtleAdventureGame = game
+
+    @property
+    def is_running(self) -> bool:
+        return self.game.is_started
+
+    def tick(self) -> None:
+        self.game.tick()
+
+
+class HeadlessInstance(HostedInstance):
+    """
+    A hosted GameState advanced without any canvas, optionally steered by a
+    planner
+    """
+
+    def __init__(self, name: str, state: GameState,
+                 planner: Optional[WaypointPlanner] = None,
+                 replan_every: int = 6):
+        super().__init__(name)
+        self.state: GameState = state
+        self.planner: Optional[WaypointPlanner] = planner
+        self.replan_every: int = replan_every
+
+    @property
+    def is_running(self) -> bool:
+        return self.state.status == RUNNING
+
+    def tick(self) -> None:
+        waypoint: Optional[Point] = None
+        if self.planner is not None and self.ticks % self.replan_every == 0:
+            waypoint = self.planner.plan(self.state)
+        self.state.step(waypoint)
+
+
+class GameHost:
+    """
+    Run several game instances under one shared tick scheduler.
+
+    Every round, each running instance is owed one tick.  Instances are
+    served in an order that rotates from round to round, and once the
+    round's CPU budget (a fraction of the tick interval) is used up the
+    remaining instances keep their owed ticks and are served first in the
+    next round, so no instance can starve the others.  Canvas updates of all
+    instances are flushed together at the end of each round.
+    """
+
+    # pylint: disable=too-many-instance-attributes,too-many-arguments
+    def __init__(self,
+                 root: Optional[tk.Tk] = None,
+                 tick_ms: int = 33,
+                 budget: float = 0.8,
+                 max_owed: int = 3,
+                 columns: int = 2):
+        self.__root: Optional[tk.Tk] = root
+        self.__tick_ms: int = tick_ms
+        self.__budget: float = budget * tick_ms / 1000
+        self.__max_owed: int = max_owed
+        self.__columns: int = columns
+        self.__instances: list[HostedInstance] = []
+        self.__next: int = 0
+        self.__rounds: int = 0
+        self.__overruns: int = 0
+        self.__started_at: Optional[float] = None
+        self.__running: bool = False
+        self.__deadline: float = 0.0
+
+    @property
+    def instances(self) -> tuple[HostedInstance, ...]:
+        """
+        Get all hosted instances
+        """
+        return tuple(self.__instances)
+
+    def add(self, instance: HostedInstance) -> HostedInstance:
+        """
+        Add an instance to be run by this host
+        """
+        self.__instances.append(instance)
+        return instance
+
+    def add_canvas_game(self, width: int, height: int, level: int = 1,
+                        immediate_input: bool = True,
+                        compiled_level: Optional[CompiledLevel] = None
+                        ) -> TurtleAdventureGame:
+        """
+        Create a game with its own canvas in the host's window, laid out in a
+        grid, and start it under this host's scheduler
+        """
+        # the turtle module is slow to import, so only load it once a canvas
+        # game is actually hosted
+        # pylint: disable=import-outside-toplevel
+        from turtle_screens import HostedScreen
+
+        if self.__root is None:
+            raise RuntimeError("canvas games need a host with a root window")
+        index = len(self.__instances)
+        frame = tk.Frame(self.__root)
+        frame.grid(row=index // self.__columns, column=index % self.__columns)
+        game = TurtleAdventureGame(frame, width, height, level=level,
+                                   immediate_input=immediate_input,
+                                   screen_factory=HostedScreen,
+                                   compiled_level=compiled_level)
+        game.start(animate=False)
+        self.add(CanvasInstance(f"canvas-{index}", game))
+        return game
+
+    def add_headless_game(self, state: GameState,
+                          planner: Optional[WaypointPlanner] = None
+                          ) -> GameState:
+        """
+        Add a simulated game without canvas, optionally steered by a planner
+        """
+        index = len(self.__instances)
+        self.add(HeadlessInstance(f"headless-{index}", state, planner))
+        return state
+
+    def run_round(self) -> None:
+        """
+        Serve one round of ticks to all running instances and flush their
+        canvases
+        """
+        if self.__started_at is None:
+            self.__started_at = time.perf_counter()
+        # rotate over all instances, skipping finished ones, so that the
+        # rotation stays in place when an instance finishes
+        instances = self.__instances
+        for instance in instances:
+            instance.owed = (min(instance.owed + 1, self.__max_owed)
+                             if instance.is_running else 0)
+        round_start = time.perf_counter()
+        count = len(instances)
+        served = 0
+        for offset in range(count):
+            position = (self.__next + offset) % count
+            instance = instances[position]
+            ticks = instance.ticks
+            while instance.owed and instance.is_running:
+                started = time.perf_counter()
+                if served and started - round_start > self.__budget:
+                    break
+                instance.tick()
+                instance.busy += time.perf_counter() - started
+                instance.ticks += 1
+                instance.owed -= 1
+                served += 1
+            if instance.owed and instance.is_running:
+                # out of budget: start with this instance next round, unless
+                # it has been served this round already
+                self.__next = (position if instance.ticks == ticks
+                               else self.__next_running(position))
+                self.__overruns += 1
+                break
+        else:
+            self.__next = self.__next_running(self.__next)
+        for instance in instances:
+            if instance.owed and instance.is_running:
+                instance.deferred_rounds += 1
+        self.__rounds += 1
+        if self.__root is not None:
+            self.__root.update_idletasks()
+
+    def __next_running(self, position: int) -> int:
+        # the first running instance after position, or position itself
+        count = len(self.__instances)
+        for offset in range(1, count + 1):
+            candidate = (position + offset) % count
+            if self.__instances[candidate].is_running:
+                return candidate
+        return position
+
+    def run(self, rounds: int, realtime: bool = False) -> None:
+        """
+        Run the given number of rounds right away, e.g., for headless games,
+        optionally pacing them at the tick interval
+        """
+        deadline = time.perf_counter()
+        for _ in range(rounds):
+            self.run_round()
+            if realtime:
+                deadline += self.__tick_ms / 1000
+                time.sleep(max(deadline - time.perf_counter(), 0))
+
+    def start(self) -> None:
+        """
+        Start running rounds from the root window's event loop at the tick
+        interval
+        """
+        if self.__root is None:
+            raise RuntimeError("start() needs a host with a root window, "
+                               "use run() for headless games")
+        if not self.__running:
+            self.__running = True
+            self.__deadline = time.perf_counter()
+            self.__loop()
+
+    def stop(self) -> None:
+        """
+        Stop running rounds
+        """
+        self.__running = False
+
+    def __loop(self) -> None:
+        if not self.__running:
+            return
+        self.run_round()
+        # aim at a fixed rate instead of a fixed pause after each round
+        now = time.perf_counter()
+        self.__deadline = max(self.__deadline + self.__tick_ms / 1000, now)
+        self.__root.after(int((self.__deadline - now) * 1000), self.__loop)
+
+    def stats(self) -> list[InstanceStats]:
+        """
+        Return throughput statistics of every instance
+        """
+        elapsed = self.__elapsed()
+        return [InstanceStats(instance.name,
+                              instance.ticks,
+                              instance.ticks / elapsed if elapsed else 0.0,
+                              (instance.busy / instance.ticks * 1000
+                               if instance.ticks else 0.0),
+                              instance.deferred_rounds)
+                for instance in self.__instances]
+
+    def aggregate(self) -> HostStats:
+        """
+        Return throughput statistics of all instances together
+        """
+        elapsed = self.__elapsed()
+        ticks = sum(instance.ticks for instance in self.__instances)
+        busy = sum(instance.busy for instance in self.__instances)
+        return HostStats(self.__rounds,
+                         self.__overruns,
+                         ticks,
+                         ticks / elapsed if elapsed else 0.0,
+                         busy / elapsed if elapsed else 0.0)
+
+    def __elapsed(self) -> float:
+        if self.__started_at is None:
+            return 0.0
+        return time.perf_counter() - self.__started_at
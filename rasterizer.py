@@ -0,0 +1,271 @@
+"""
+The rasterizer module draws simulated Turtle's Adventure game states straight
+into NumPy image buffers, without Tk, e.g., to export gameplay videos or to
+compare frames against golden images in visual regression tests.
+
+This module requires NumPy.
+"""
+import math
+from typing import BinaryIO, NamedTuple, Optional
+import numpy as np
+from simulation import GameState, Point, RUNNING
+from colors import parse_color
+
+# the "turtle" shape of the turtle module, nose pointing along +y
+TURTLE_SHAPE: tuple[Point, ...] = (
+    (0, 16), (-2, 14), (-1, 10), (-4, 7), (-7, 9), (-9, 8), (-6, 5), (-7, 1),
+    (-5, -3), (-8, -6), (-6, -8), (-4, -5), (0, -7), (4, -5), (6, -8),
+    (8, -6), (5, -3), (7, 1), (6, 5), (9, 8), (7, 9), (4, 7), (1, 10),
+    (2, 14))
+
+
+class Rasterizer:
+    """
+    Render GameState instances into a reused RGB image buffer of shape
+    (height, width, 3).  Enemies of the same kind and size are drawn with a
+    single vectorized assignment per group.
+    """
+
+    def __init__(self, width: int, height: int,
+                 background: str = "white"):
+        self.__width: int = width
+        self.__height: int = height
+        # copying a prepared blank frame is far cheaper than broadcasting the
+        # background color into the buffer every frame
+        self.__blank = np.empty((height, width, 3), dtype=np.uint8)
+        self.__blank[:] = parse_color(background)
+        self.__buffer = np.empty_like(self.__blank)
+        # (shape, size) -> (fill offsets, outline offsets)
+        self.__stamps: dict[tuple[str, int], tuple[np.ndarray,
+                                                   np.ndarray]] = {}
+        self.__colors: dict[str, np.ndarray] = {}
+
+    @property
+    def shape(self) -> tuple[int, int, int]:
+        """
+        Get the shape of the rendered frames
+        """
+        return self.__height, self.__width, 3
+
+    def render(self, state: GameState) -> np.ndarray:
+        """
+        Draw the given state and return the image buffer.  The buffer is
+        reused by the next call, so copy it if it needs to be kept.
+        """
+        buffer = self.__buffer
+        np.copyto(buffer, self.__blank)
+        arena = state.arena
+        self.__draw_square_outline(arena.home_x, arena.home_y,
+                                   state.home_size, self.__color("brown"))
+        self.__draw_enemies(state)
+        if state.waypoint is not None:
+            self.__draw_waypoint(*state.waypoint)
+        self.__draw_player(state)
+        return buffer
+
+    def __color(self, color: str) -> np.ndarray:
+        if color not in self.__colors:
+            self.__colors[color] = np.array(parse_color(color),
+                                            dtype=np.uint8)
+        return self.__colors[color]
+
+    def __stamp(self, shape: str, size: int) -> tuple[np.ndarray, np.ndarray]:
+        key = (shape, size)
+        if key not in self.__stamps:
+            # pixel centers relative to the item's center, matching the bbox
+            # (x - size / 2, y - size / 2, x + size / 2, y + size / 2)
+            half = size / 2
+            offsets = np.arange(-math.ceil(half), math.ceil(half) + 1)
+            dy, dx = np.meshgrid(offsets, offsets, indexing="ij")
+            if shape == "circle":
+                radius = np.hypot(dx, dy)
+                inside = radius <= half
+                outline = inside & (radius > half - 1)
+            else:
+                inside = (np.abs(dx) <= half) & (np.abs(dy) <= half)
+                outline = inside & ((np.abs(dx) > half - 1)
+                                    | (np.abs(dy) > half - 1))
+            fill = inside & ~outline
+            self.__stamps[key] = (np.stack([dy[fill], dx[fill]]),
+                                  np.stack([dy[outline], dx[outline]]))
+        return self.__stamps[key]
+
+    def __blit(self, ys: np.ndarray, xs: np.ndarray, offsets: np.ndarray,
+               color: np.ndarray) -> None:
+        rows = (ys[:, None] + offsets[0][None, :]).ravel()
+        cols = (xs[:, None] + offsets[1][None, :]).ravel()
+        visible = ((rows >= 0) & (rows < self.__height)
+                   & (cols >= 0) & (cols < self.__width))
+        self.__buffer[rows[visible], cols[visible]] = color
+
+    def __draw_enemies(self, state: GameState) -> None:
+        if not state.kinds:
+            return
+        xs = np.rint(np.asarray(state.xs)).astype(np.intp)
+        ys = np.rint(np.asarray(state.ys)).astype(np.intp)
+        sizes = np.asarray(state.sizes)
+        indices = np.asarray([kind.kind_id for kind in state.kinds])
+        kinds = {kind.kind_id: kind for kind in state.kinds}
+        for index, kind in kinds.items():
+            of_kind = indices == index
+            for size in np.unique(sizes[of_kind]):
+                group = of_kind & (sizes == size)
+                fill, outline = self.__stamp(kind.shape, int(size))
+                self.__blit(ys[group], xs[group], fill,
+                            self.__color(kind.color))
+                self.__blit(ys[group], xs[group], outline,
+                            self.__color(kind.outline))
+
+    def __draw_square_outline(self, x: float, y: float, size: float,
+                              color: np.ndarray) -> None:
+        _, outline = self.__stamp("square", int(size))
+        self.__blit(np.array([round(y)]), np.array([round(x)]), outline,
+                    color)
+
+    def __draw_line(self, x1: float, y1: float, x2: float, y2: float,
+                    color: np.ndarray, width: int = 2) -> None:
+        steps = int(max(abs(x2 - x1), abs(y2 - y1))) + 1
+        xs = np.rint(np.linspace(x1, x2, steps)).astype(np.intp)
+        ys = np.rint(np.linspace(y1, y2, steps)).astype(np.intp)
+        pen = np.arange(width) - width // 2
+        dy, dx = np.meshgrid(pen, pen, indexing="ij")
+        self.__blit(ys, xs, np.stack([dy.ravel(), dx.ravel()]), color)
+
+    def __draw_waypoint(self, x: float, y: float) -> None:
+        green = self.__color("green")
+        self.__draw_line(x - 10, y - 10, x + 10, y + 10, green)
+        self.__draw_line(x - 10, y + 10, x + 10, y - 10, green)
+
+    def __draw_player(self, state: GameState) -> None:
+        px, py = state.player
+        forward = np.array([math.cos(state.heading),
+                            math.sin(state.heading)])
+        side = np.array([-forward[1], forward[0]])
+        shape = np.asarray(TURTLE_SHAPE, dtype=float)
+        polygon = (shape[:, 1:2] * forward + shape[:, 0:1] * side
+                   + np.array([px, py]))
+        left, top = np.floor(polygon.min(axis=0)).astype(int)
+        right, bottom = np.ceil(polygon.max(axis=0)).astype(int)
+        cols = np.arange(max(left, 0), min(right + 1, self.__width))
+        rows = np.arange(max(top, 0), min(bottom + 1, self.__height))
+        if not len(cols) or not len(rows):
+            return
+        grid_y, grid_x = np.meshgrid(rows + 0.5, cols + 0.5, indexing="ij")
+        inside = _inside_polygon(grid_x.ravel(), grid_y.ravel(), polygon)
+        block = self.__buffer[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1]
+        block[inside.reshape(len(rows), len(cols))] = self.__color("black")
+
+
+def _inside_polygon(xs: np.ndarray, ys: np.ndarray,
+                    polygon: np.ndarray) -> np.ndarray:
+    # even-odd rule, evaluated for all points against all edges at once
+    x1, y1 = polygon[:, 0], polygon[:, 1]
+    x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+    crosses = (y1[None, :] > ys[:, None]) != (y2[None, :] > ys[:, None])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        at_x = x1 + (ys[:, None] - y1) * (x2 - x1) / (y2 - y1)
+    return np.count_nonzero(crosses & (xs[:, None] < at_x), axis=1) % 2 == 1
+
+
+class FrameWriter:
+    """
+    Stream frames to a binary file object, either as raw RGB24 data or as
+    a YUV4MPEG2 (4:4:4) stream that video tools read without extra options.
+    Raw output can be converted with, e.g.,
+    ffmpeg -f rawvideo -pix_fmt rgb24 -s WIDTHxHEIGHT -r 30 -i FILE out.mp4
+    """
+
+    def __init__(self, file: BinaryIO, width: int, height: int,
+                 fps: int = 30, fmt: str = "raw"):
+        if fmt not in ("raw", "y4m"):
+            raise ValueError(f"unsupported format {fmt!r}")
+        self.__file: BinaryIO = file
+        self.__shape: tuple[int, int, int] = (height, width, 3)
+        self.__format: str = fmt
+        self.__frames: int = 0
+        if fmt == "y4m":
+            file.write(f"YUV4MPEG2 W{width} H{height} F{fps}:1 Ip A1:1 "
+                       f"C444\n".encode("ascii"))
+
+    @property
+    def frames(self) -> int:
+        """
+        Get the number of frames written so far
+        """
+        return self.__frames
+
+    def write(self, frame: np.ndarray) -> None:
+        """
+        Append a frame of shape (height, width, 3)
+        """
+        if frame.shape != self.__shape:
+            raise ValueError(f"expected a frame of shape {self.__shape}, "
+                             f"got {frame.shape}")
+        if self.__format == "y4m":
+            self.__file.write(b"FRAME\n")
+            self.__file.write(_rgb_to_yuv444(frame).tobytes())
+        else:
+            self.__file.write(np.ascontiguousarray(frame).tobytes())
+        self.__frames += 1
+
+
+def _rgb_to_yuv444(frame: np.ndarray) -> np.ndarray:
+    # BT.601 limited range in 8-bit fixed point, returned as planar Y, U, V
+    r = frame[..., 0].astype(np.int32)
+    g = frame[..., 1].astype(np.int32)
+    b = frame[..., 2].astype(np.int32)
+    y = ((66 * r + 129 * g + 25 * b + 128) >> 8) + 16
+    u = ((-38 * r - 74 * g + 112 * b + 128) >> 8) + 128
+    v = ((112 * r - 94 * g - 18 * b + 128) >> 8) + 128
+    return np.stack([y, u, v]).astype(np.uint8)
+
+
+class FrameDiff(NamedTuple):
+    """
+    Result of comparing a frame against a golden frame
+    """
+    changed_pixels: int
+    max_delta: int
+    mask: np.ndarray
+
+    @property
+    def matches(self) -> bool:
+        """
+        Get the flag indicating whether no pixel differs beyond tolerance
+        """
+        return self.changed_pixels == 0
+
+
+def compare_frames(frame: np.ndarray, golden: np.ndarray,
+                   tolerance: int = 0) -> FrameDiff:
+    """
+    Compare a frame against a golden frame of the same shape.  Pixels whose
+    channels differ by more than tolerance are marked in the result's mask.
+    """
+    if frame.shape != golden.shape:
+        raise ValueError(f"frame shape {frame.shape} does not match golden "
+                         f"shape {golden.shape}")
+    delta = np.abs(frame.astype(np.int16) - golden.astype(np.int16)).max(
+        axis=-1)
+    mask = delta > tolerance
+    return FrameDiff(int(np.count_nonzero(mask)), int(delta.max(initial=0)),
+                     mask)
+
+
+def render_replay(state: GameState, n_ticks: int, writer: FrameWriter,
+                  inputs: Optional[dict[int, Point]] = None) -> GameState:
+    """
+    Simulate a clone of state for up to n_ticks ticks, or until the game is
+    over, and write one frame per tick.  Returns the final state.
+    """
+    state = state.clone()
+    arena = state.arena
+    rasterizer = Rasterizer(arena.width, arena.height)
+    inputs = inputs or {}
+    writer.write(rasterizer.render(state))
+    for offset in range(n_ticks):
+        if state.status != RUNNING:
+            break
+        state.step(inputs.get(offset))
+        writer.write(rasterizer.render(state))
+    return state
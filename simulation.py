@@ -0,0 +1,379 @@
+"""
+The simulation module keeps a Tk-free copy of the Turtle's Adventure game
+state that can be cloned cheaply and advanced tick by tick, e.g., to look
+ahead for an autopilot or to predict where enemies are heading.
+
+The enemies are stored column-wise in plain lists, one group of columns per
+enemy kind, and shared copy-on-write between clones, so a clone costs next to
+nothing until it is advanced.  Every tick advances each group with one call of
+its kind's batch behavior, which moves enemies exactly like the behaviors of
+the live game.  Enemies of different kinds are advanced one kind after the
+other, so if several kinds drew from the random generator while moving, their
+draws would interleave differently than in the live game.
+"""
+import math
+import random
+import time
+from typing import Optional, TYPE_CHECKING
+from enemy_defs import Arena, EnemyKind
+from crowd import CrowdGrid
+from levels import CompiledLevel
+from turtle_adventure import DefinedEnemy
+
+if TYPE_CHECKING:
+    from turtle_adventure import TurtleAdventureGame
+
+RUNNING, WON, LOST = range(3)
+
+Point = tuple[float, float]
+
+
+class _Columns:
+    """
+    The enemies of one kind, stored column-wise for batch behaviors
+    """
+
+    __slots__ = ("kind", "xs", "ys", "states", "target_xs", "target_ys",
+                 "sizes")
+
+    def __init__(self, kind: EnemyKind):
+        self.kind: EnemyKind = kind
+        self.xs: list[float] = []
+        self.ys: list[float] = []
+        self.states: list[int] = []
+        self.target_xs: list[float] = []
+        self.target_ys: list[float] = []
+        self.sizes: list[float] = []
+
+    def copy(self) -> "_Columns":
+        """
+        Return a copy that does not share any column with this one
+        """
+        copy = _Columns(self.kind)
+        copy.xs = self.xs[:]
+        copy.ys = self.ys[:]
+        copy.states = self.states[:]
+        copy.target_xs = self.target_xs[:]
+        copy.target_ys = self.target_ys[:]
+        copy.sizes = self.sizes[:]
+        return copy
+
+
+class GameState:
+    """
+    A side-effect-free snapshot of a game that can be cloned and simulated
+    """
+
+    # pylint: disable=too-many-instance-attributes
+    def __init__(self,
+                 arena: Arena,
+                 player_speed: float,
+                 home_size: float,
+                 waypoint: Optional[Point] = None,
+                 tick_ms: int = 33):
+        self.arena: Arena = arena
+        self.player_speed: float = player_speed
+        self.home_size: float = home_size
+        self.waypoint: Optional[Point] = waypoint
+        # points queued after the waypoint, e.g., from a dragged path
+        self.path: tuple[Point, ...] = ()
+        # direction the player faces, in radians from the x axis towards the
+        # y axis of the canvas
+        self.heading: float = 0.0
+        self.tick_ms: int = tick_ms
+        self.tick: int = 0
+        self.status: int = RUNNING
+        # kind_id -> enemies of that kind, in the order the kinds appeared
+        self.groups: dict[int, _Columns] = {}
+        # (tick, kind, count, first row in compiled_level or None to roll
+        # the enemies) of spawn waves that have not appeared yet
+        self.pending: list[tuple[int, EnemyKind, int, Optional[int]]] = []
+        # the level whose stored enemies pending waves with a first row spawn
+        self.compiled_level: Optional[CompiledLevel] = None
+        # keeps enemies apart like the live game does, if set
+        self.crowd: Optional[CrowdGrid] = None
+        # separate enemies only every this many ticks, making up for the
+        # skipped ticks, e.g., for rollouts that can do with rough crowds
+        self.separation_interval: int = 1
+        self.__shared: bool = False
+
+    @classmethod
+    def from_game(cls, game: "TurtleAdventureGame") -> "GameState":
+        """
+        Take a snapshot of a running game.  Enemies that are not driven by
+        enemy definitions cannot be simulated and are left out.
+        """
+        source = game.arena
+        arena = Arena(source.width, source.height,
+                      (source.home_x, source.home_y), _copy_rng(source.rng))
+        arena.track_player(game.player.x, game.player.y)
+        waypoint = game.waypoint
+        state = cls(arena, game.player.speed, game.home.size,
+                    (waypoint.x, waypoint.y) if waypoint.is_active else None,
+                    game.update_delay)
+        if waypoint.is_active:
+            state.path = tuple(waypoint.path)
+        state.heading = math.radians(game.player.heading)
+        crowd = game.crowd
+        state.crowd = CrowdGrid(crowd.cell_size, crowd.padding, crowd.strength)
+        for enemy in game.enemies:
+            if isinstance(enemy, DefinedEnemy):
+                state.add_enemy(enemy.kind, enemy.x, enemy.y, enemy.size,
+                                enemy.state, enemy.target_x, enemy.target_y)
+        now = time.perf_counter()
+        tick_seconds = game.update_delay / 1000
+        generator = game.enemy_generator
+        state.compiled_level = generator.compiled
+        for due, kind, count, first in generator.pending:
+            tick = max(1, math.ceil((due - now) / tick_seconds))
+            state.pending.append((tick, kind, count, first))
+        return state
+
+    @property
+    def player(self) -> Point:
+        """
+        Get the player's position
+        """
+        return self.arena.player_x, self.arena.player_y
+
+    @property
+    def enemy_count(self) -> int:
+        """
+        Get the number of enemies currently in the state
+        """
+        return sum(len(group.xs) for group in self.groups.values())
+
+    @property
+    def kinds(self) -> list[EnemyKind]:
+        """
+        Get the kind of every enemy, grouped by kind
+        """
+        return [group.kind for group in self.groups.values()
+                for _ in group.xs]
+
+    @property
+    def xs(self) -> list[float]:
+        """
+        Get the x coordinates of all enemies in the order of kinds
+        """
+        return [x for group in self.groups.values() for x in group.xs]
+
+    @property
+    def ys(self) -> list[float]:
+        """
+        Get the y coordinates of all enemies in the order of kinds
+        """
+        return [y for group in self.groups.values() for y in group.ys]
+
+    @property
+    def sizes(self) -> list[float]:
+        """
+        Get the sizes of all enemies in the order of kinds
+        """
+        return [size for group in self.groups.values() for size in group.sizes]
+
+    # pylint: disable=too-many-arguments
+    def add_enemy(self, kind: EnemyKind, x: float, y: float, size: float,
+                  state: int, target_x: float = 0,
+                  target_y: float = 0) -> None:
+        """
+        Append an enemy of the given kind to the state
+        """
+        self.__unshare()
+        group = self.groups.get(kind.kind_id)
+        if group is None:
+            group = self.groups[kind.kind_id] = _Columns(kind)
+        group.xs.append(x)
+        group.ys.append(y)
+        group.states.append(state)
+        group.target_xs.append(target_x)
+        group.target_ys.append(target_y)
+        group.sizes.append(size)
+
+    def clone(self) -> "GameState":
+        """
+        Return an independent copy of this state.  Enemy columns are shared
+        until either copy is advanced or modified.
+        """
+        arena = self.arena
+        copy = GameState.__new__(GameState)
+        copy.arena = Arena(arena.width, arena.height,
+                           (arena.home_x, arena.home_y), _copy_rng(arena.rng))
+        copy.arena.track_player(arena.player_x, arena.player_y)
+        copy.player_speed = self.player_speed
+        copy.home_size = self.home_size
+        copy.waypoint = self.waypoint
+        copy.path = self.path
+        copy.heading = self.heading
+        copy.tick_ms = self.tick_ms
+        copy.tick = self.tick
+        copy.status = self.status
+        copy.groups = self.groups
+        copy.pending = self.pending
+        copy.compiled_level = self.compiled_level
+        # the grid tracks the rows of one state only, so start a fresh one
+        crowd = self.crowd
+        copy.crowd = (CrowdGrid(crowd.cell_size, crowd.padding,
+                                crowd.strength)
+                      if crowd is not None else None)
+        copy.separation_interval = self.separation_interval
+        copy.__shared = True
+        self.__shared = True
+        return copy
+
+    def __unshare(self) -> None:
+        if self.__shared:
+            self.groups = {kind_id: group.copy()
+                           for kind_id, group in self.groups.items()}
+            self.pending = self.pending[:]
+            self.__shared = False
+
+    def simulate(self, n_ticks: int,
+                 inputs: Optional[dict[int, Point]] = None) -> "GameState":
+        """
+        Return a clone of this state advanced by up to n_ticks ticks, or until
+        the game is over.  inputs maps tick offsets to new waypoints for the
+        player.  This state itself is left untouched.
+        """
+        state = self.clone()
+        inputs = inputs or {}
+        for offset in range(n_ticks):
+            if state.status != RUNNING:
+                break
+            state.step(inputs.get(offset))
+        return state
+
+    def predict(self, n_ticks: int,
+                inputs: Optional[dict[int, Point]] = None
+                ) -> list[list[tuple[float, float, float]]]:
+        """
+        Return the (x, y, size) of every enemy after each of the next n_ticks
+        ticks, e.g., for drawing a danger overlay.  This state itself is left
+        untouched.
+        """
+        state = self.clone()
+        inputs = inputs or {}
+        frames = []
+        for offset in range(n_ticks):
+            if state.status != RUNNING:
+                break
+            state.step(inputs.get(offset))
+            frames.append([frame for group in state.groups.values()
+                           for frame in zip(group.xs, group.ys,
+                                            group.sizes)])
+        return frames
+
+    def nearest_enemy_distance(self) -> float:
+        """
+        Return the distance from the player to the edge of the closest enemy
+        """
+        px, py = self.player
+        return min((max(abs(x - px), abs(y - py)) - size / 2
+                    for group in self.groups.values()
+                    for x, y, size in zip(group.xs, group.ys, group.sizes)),
+                   default=math.inf)
+
+    def step(self, waypoint: Optional[Point] = None) -> None:
+        """
+        Advance this state by one tick in place, optionally setting a new
+        waypoint for the player first, which drops any queued path
+        """
+        if self.status != RUNNING:
+            return
+        self.__unshare()
+        if waypoint is not None:
+            self.waypoint = waypoint
+            self.path = ()
+        self.tick += 1
+        arena = self.arena
+        while self.pending and self.pending[0][0] <= self.tick:
+            _, kind, count, first = self.pending.pop(0)
+            if first is not None:
+                self.__spawn_compiled(kind, first, count)
+                continue
+            for _ in range(count):
+                # same draws in the same order as DefinedEnemy
+                size = arena.rng.choice(kind.sizes)
+                state = kind.pick_state(arena.rng)
+                target_x, target_y = kind.pick_target(arena)
+                x, y = kind.place(arena)
+                self.add_enemy(kind, x, y, size, state, target_x, target_y)
+        self.__separate_enemies()
+        self.__step_player()
+        self.__step_enemies()
+
+    def __spawn_compiled(self, kind: EnemyKind, first: int,
+                         count: int) -> None:
+        # the same stored rows that EnemyGenerator replays
+        level = self.compiled_level
+        for i in range(first, first + count):
+            self.add_enemy(kind, level.xs[i], level.ys[i], level.sizes[i],
+                           level.states[i], level.target_xs[i],
+                           level.target_ys[i])
+
+    def __separate_enemies(self) -> None:
+        crowd = self.crowd
+        interval = self.separation_interval
+        if crowd is None or self.tick % interval:
+            return
+        # bodies of kinds that ignore crowds would be skipped anyway
+        groups = [group for group in self.groups.values()
+                  if group.kind.separation > 0]
+        if not groups:
+            return
+        dxs, dys = crowd.separate(
+            [x for group in groups for x in group.xs],
+            [y for group in groups for y in group.ys],
+            [size for group in groups for size in group.sizes],
+            [group.kind.separation for group in groups for _ in group.xs])
+        # offsets grow with the strength, which must not exceed resolving
+        # overlaps entirely
+        scale = min(interval, 1 / crowd.strength) if interval > 1 else 1
+        first = 0
+        for group in groups:
+            last = first + len(group.xs)
+            group.xs = [x + dx * scale
+                        for x, dx in zip(group.xs, dxs[first:last])]
+            group.ys = [y + dy * scale
+                        for y, dy in zip(group.ys, dys[first:last])]
+            first = last
+
+    def __step_player(self) -> None:
+        arena = self.arena
+        px, py = arena.player_x, arena.player_y
+        half = self.home_size / 2
+        if abs(px - arena.home_x) <= half and abs(py - arena.home_y) <= half:
+            self.status = WON
+        if self.waypoint is None:
+            return
+        speed = self.player_speed
+        wx, wy = self.waypoint
+        # like turtle.towards(), which faces along the x axis when the
+        # player stands on the waypoint
+        self.heading = math.atan2(wy - py, wx - px)
+        px += speed * math.cos(self.heading)
+        py += speed * math.sin(self.heading)
+        if math.hypot(wx - px, wy - py) < speed:
+            # move on to the next queued point like Waypoint.advance()
+            if self.path:
+                self.waypoint, self.path = self.path[0], self.path[1:]
+            else:
+                self.waypoint = None
+        arena.track_player(px, py)
+
+    def __step_enemies(self) -> None:
+        arena = self.arena
+        for group in self.groups.values():
+            group.kind.batch_behavior(group, group.kind, arena)
+        px, py = arena.player_x, arena.player_y
+        for group in self.groups.values():
+            hits = [x for x, y, size in zip(group.xs, group.ys, group.sizes)
+                    if abs(x - px) < size / 2 and abs(y - py) < size / 2]
+            if hits:
+                self.status = LOST
+
+
+def _copy_rng(rng: random.Random) -> random.Random:
+    copy = random.Random()
+    copy.setstate(rng.getstate())
+    return copy
@@ -0,0 +1,337 @@
+"""
+The telemetry module provides diagnostic tools that watch a running game for
+leaked canvas items and game element objects, and that measure how long the
+game takes to start and to respond to input.
+"""
+import bisect
+import gc
+import time
+from collections import Counter
+import tkinter as tk
+from typing import Callable, NamedTuple, Optional
+from gamelib import Game, GameElement
+
+
+class LeakReport(NamedTuple):
+    """
+    A snapshot of canvas items and game element objects taken by
+    LeakTelemetry.  Counts are keyed by element class name.
+    """
+    timestamp: float
+    canvas_items: int
+    orphaned_items: tuple[int, ...]
+    dangling_items: tuple[int, ...]
+    registered: dict[str, int]
+    live: dict[str, int]
+    growth: dict[str, float]
+    item_growth: float
+
+    @property
+    def detached(self) -> dict[str, int]:
+        """
+        Get the number of live element objects per class that are not
+        registered in the game, e.g., deleted elements that are still
+        referenced somewhere or elements that were never added
+        """
+        return {name: count - self.registered.get(name, 0)
+                for name, count in self.live.items()
+                if count > self.registered.get(name, 0)}
+
+    def summary(self) -> str:
+        """
+        Return a short human-readable summary of this report
+        """
+        lines = [f"canvas items: {self.canvas_items} "
+                 f"({self.item_growth:+.1f}/s), "
+                 f"orphaned: {len(self.orphaned_items)}, "
+                 f"dangling: {len(self.dangling_items)}"]
+        detached = self.detached
+        for name in sorted(self.live):
+            lines.append(f"  {name}: live={self.live[name]} "
+                         f"registered={self.registered.get(name, 0)} "
+                         f"detached={detached.get(name, 0)} "
+                         f"({self.growth.get(name, 0.0):+.1f}/s)")
+        return "\n".join(lines)
+
+
+class LeakTelemetry:
+    """
+    Periodically reconcile the items on a game's canvas against the items
+    owned by its registered game elements, and keep track of how many game
+    element objects of each class are alive.
+
+    Canvas items that no registered element owns are reported as orphaned;
+    items that registered elements claim but which no longer exist on the
+    canvas are reported as dangling.
+    """
+
+    def __init__(self,
+                 game: Game,
+                 interval: int = 5000,
+                 on_report: Optional[Callable[[LeakReport], None]] = None,
+                 history: int = 100):
+        self.__game: Game = game
+        self.__interval: int = interval
+        self.__on_report = on_report
+        self.__history: int = history
+        self.__reports: list[LeakReport] = []
+        self.__running: bool = False
+
+    @property
+    def game(self) -> Game:
+        """
+        Return reference to the monitored Game instance
+        """
+        return self.__game
+
+    @property
+    def reports(self) -> tuple[LeakReport, ...]:
+        """
+        Get the most recent reports, oldest first
+        """
+        return tuple(self.__reports)
+
+    @property
+    def is_running(self) -> bool:
+        """
+        Get the flag indicating whether periodic sampling is active
+        """
+        return self.__running
+
+    def start(self) -> None:
+        """
+        Start taking a sample every interval milliseconds
+        """
+        if not self.__running:
+            self.__running = True
+            self.__tick()
+
+    def stop(self) -> None:
+        """
+        Stop periodic sampling
+        """
+        self.__running = False
+
+    def __tick(self) -> None:
+        if not self.__running:
+            return
+        report = self.sample()
+        if self.__on_report is not None:
+            self.__on_report(report)
+        self.game.after(self.__interval, self.__tick)
+
+    def sample(self) -> LeakReport:
+        """
+        Take a new sample immediately, record it and return the report
+        """
+        now = time.perf_counter()
+        on_canvas = set(self.game.canvas.find_all())
+        owned = set()
+        registered = Counter()
+        for element in self.game.elements:
+            owned.update(element.canvas_items())
+            registered[type(element).__name__] += 1
+        # a full heap walk is the only way to find elements that dropped out
+        # of the registry, which is why sampling should stay infrequent
+        live = Counter(type(obj).__name__ for obj in gc.get_objects()
+                       if isinstance(obj, GameElement))
+
+        growth = {}
+        item_growth = 0.0
+        if self.__reports:
+            last = self.__reports[-1]
+            elapsed = max(now - last.timestamp, 1e-9)
+            for name in live.keys() | last.live.keys():
+                growth[name] = (live.get(name, 0)
+                                - last.live.get(name, 0)) / elapsed
+            item_growth = (len(on_canvas) - last.canvas_items) / elapsed
+
+        report = LeakReport(timestamp=now,
+                            canvas_items=len(on_canvas),
+                            orphaned_items=tuple(sorted(on_canvas - owned)),
+                            dangling_items=tuple(sorted(owned - on_canvas)),
+                            registered=dict(registered),
+                            live=dict(live),
+                            growth=growth,
+                            item_growth=item_growth)
+        self.__reports.append(report)
+        del self.__reports[:-self.__history]
+        return report
+
+
+class StartupProfiler:
+    """
+    Record the duration of consecutive startup phases, e.g., imports, Tk
+    initialization and game construction, up to the first frame being drawn.
+    """
+
+    def __init__(self, origin: Optional[float] = None):
+        self.__origin: float = (origin if origin is not None
+                                else time.perf_counter())
+        self.__last: float = self.__origin
+        self.__phases: list[tuple[str, float]] = []
+
+    @property
+    def phases(self) -> tuple[tuple[str, float], ...]:
+        """
+        Get (name, seconds) pairs of all recorded phases in order
+        """
+        return tuple(self.__phases)
+
+    @property
+    def total(self) -> float:
+        """
+        Get the number of seconds from the origin to the last recorded phase
+        """
+        return self.__last - self.__origin
+
+    def mark(self, phase: str) -> None:
+        """
+        Record that the given phase has just finished
+        """
+        now = time.perf_counter()
+        self.__phases.append((phase, now - self.__last))
+        self.__last = now
+
+    def mark_first_frame(self,
+                         widget: tk.Misc,
+                         on_done: Optional[Callable[["StartupProfiler"],
+                                                    None]] = None) -> None:
+        """
+        Record the "first frame" phase once Tk has processed the pending
+        redraws of the given widget, then call on_done
+        """
+        def done():
+            self.mark("first frame")
+            if on_done is not None:
+                on_done(self)
+        # idle callbacks run in order, so this runs after Tk's own redraws
+        widget.after_idle(done)
+
+    def summary(self, budget: float = 0.1) -> str:
+        """
+        Return a human-readable summary of all phases, comparing the total
+        against the given budget in seconds
+        """
+        lines = [f"  {name:<20} {seconds * 1000:8.1f} ms"
+                 for name, seconds in self.__phases]
+        verdict = "within" if self.total <= budget else "OVER"
+        lines.append(f"  {'total':<20} {self.total * 1000:8.1f} ms "
+                     f"({verdict} {budget * 1000:.0f} ms budget)")
+        return "\n".join(["startup profile:"] + lines)
+
+
+class LatencyHistogram:
+    """
+    Count latencies in buckets whose upper bounds are given in milliseconds.
+    Latencies above the last bound fall into an overflow bucket.
+    """
+
+    BOUNDS: tuple[float, ...] = (1, 2, 5, 10, 20, 33, 50, 100, 200, 500)
+
+    def __init__(self, bounds: tuple[float, ...] = BOUNDS):
+        self.__bounds: tuple[float, ...] = bounds
+        self.__counts: list[int] = [0] * (len(bounds) + 1)
+        self.__total: float = 0
+        self.__maximum: float = 0
+
+    @property
+    def count(self) -> int:
+        """
+        Get the number of recorded latencies
+        """
+        return sum(self.__counts)
+
+    @property
+    def mean(self) -> float:
+        """
+        Get the mean latency in milliseconds
+        """
+        return self.__total / self.count if self.count else 0.0
+
+    @property
+    def maximum(self) -> float:
+        """
+        Get the largest latency in milliseconds
+        """
+        return self.__maximum
+
+    def record(self, seconds: float) -> None:
+        """
+        Record a latency given in seconds
+        """
+        millis = seconds * 1000
+        self.__counts[bisect.bisect_left(self.__bounds, millis)] += 1
+        self.__total += millis
+        self.__maximum = max(self.__maximum, millis)
+
+    def percentile(self, fraction: float) -> float:
+        """
+        Return the upper bound in milliseconds of the bucket containing the
+        given fraction of all latencies, or the maximum for the overflow
+        bucket
+        """
+        wanted = fraction * self.count
+        seen = 0
+        for bound, count in zip(self.__bounds, self.__counts):
+            seen += count
+            if count and seen >= wanted:
+                return bound
+        return self.__maximum
+
+    def summary(self, label: str = "latency") -> str:
+        """
+        Return a human-readable summary of the histogram
+        """
+        lines = [f"{label}: n={self.count} mean={self.mean:.1f} ms "
+                 f"p50<={self.percentile(0.5):g} ms "
+                 f"p95<={self.percentile(0.95):g} ms "
+                 f"max={self.maximum:.1f} ms"]
+        labels = [f"<={bound:g} ms" for bound in self.__bounds]
+        labels.append(f">{self.__bounds[-1]:g} ms")
+        for label, count in zip(labels, self.__counts):
+            if count:
+                lines.append(f"  {label:>9} {count}")
+        return "\n".join(lines)
+
+
+class TimerProbe:
+    """
+    Measure how punctually callbacks scheduled with Game.schedule() fire by
+    rescheduling one every interval milliseconds and recording how much
+    longer than interval each round trip took.  Comparing a game driven by
+    Tk's after() with one driven by Game.run_async() shows the timer
+    overhead and jitter of either driver.
+    """
+
+    def __init__(self, game: Game, interval: int = 20,
+                 histogram: Optional[LatencyHistogram] = None):
+        self.__game: Game = game
+        self.__interval: int = interval
+        self.__histogram: LatencyHistogram = (histogram if histogram
+                                              is not None
+                                              else LatencyHistogram())
+        self.__last: Optional[float] = None
+
+    @property
+    def histogram(self) -> LatencyHistogram:
+        """
+        Get the histogram of recorded lateness
+        """
+        return self.__histogram
+
+    def start(self) -> None:
+        """
+        Start probing; the first callback fires once the game has started
+        """
+        self.__game.schedule(self.__interval, self.__fire)
+
+    def __fire(self) -> None:
+        now = time.perf_counter()
+        # the first round trip may have waited for the game to start
+        if self.__last is not None:
+            self.__histogram.record(max(now - self.__last
+                                        - self.__interval / 1000, 0))
+        self.__last = now
+        if self.__game.is_started:
+            self.__game.schedule(self.__interval, self.__fire)
@@ -0,0 +1,69 @@
+"""
+Tests of the sample planner and the autopilot
+"""
+import random
+import autopilot
+from autopilot import Autopilot, WaypointPlanner
+from enemy_defs import Arena
+from simulation import GameState
+
+
+def make_state() -> GameState:
+    arena = Arena(800, 500, (700, 250), random.Random(1))
+    arena.track_player(50, 250)
+    return GameState(arena, player_speed=5, home_size=20)
+
+
+class FakeWaypoint:
+    """
+    Records where the autopilot sends the player
+    """
+
+    def __init__(self):
+        self.points = []
+
+    def activate(self, x, y):
+        self.points.append((x, y))
+
+
+class FakeGame:
+    """
+    The parts of a game the autopilot uses, with callbacks run by hand
+    """
+
+    is_started = True
+
+    def __init__(self):
+        self.waypoint = FakeWaypoint()
+        self.scheduled = []
+
+    def schedule(self, delay, callback, *args):
+        self.scheduled.append((delay, callback, args))
+
+    def run_next(self):
+        delay, callback, args = self.scheduled.pop(0)
+        callback(*args)
+        return delay
+
+
+def test_search_yields_the_plan_after_every_candidate():
+    planner = WaypointPlanner(horizon=20)
+    state = make_state()
+    found = list(planner.search(state))
+    assert len(found) == len(planner.candidates(state))
+    assert found[-1] == planner.plan(state)
+
+
+def test_autopilot_spreads_a_search_over_callbacks(monkeypatch):
+    state = make_state()
+    monkeypatch.setattr(autopilot.GameState, "from_game",
+                        lambda game: state)
+    planner = WaypointPlanner(horizon=20)
+    game = FakeGame()
+    pilot = Autopilot(game, planner, interval=200, budget=0)
+    pilot.start()
+    # one callback per candidate, and one finding the search exhausted
+    count = len(planner.candidates(state)) + 1
+    assert [game.run_next() for _ in range(count)] == [0] * count
+    assert game.waypoint.points == [planner.plan(state)]
+    assert game.scheduled[0][0] == 200
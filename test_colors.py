@@ -0,0 +1,30 @@
+"""
+Tests of resolving Tk colors without Tk
+"""
+import pytest
+from colors import parse_color
+
+
+def test_parse_hex_colors_like_x11():
+    assert parse_color("#AFD198") == (175, 209, 152)
+    assert parse_color("#fff") == (240, 240, 240)
+    assert parse_color("#ffffffffffff") == (255, 255, 255)
+
+
+def test_parse_color_names_ignoring_case_and_spaces():
+    assert parse_color("cyan") == (0, 255, 255)
+    assert parse_color("Ghost White") == parse_color("ghostwhite")
+    assert parse_color("lime") == (0, 255, 0)
+
+
+def test_names_overridden_by_web_colors_use_tk_values():
+    assert parse_color("green") == (0, 128, 0)
+    assert parse_color("maroon") == (128, 0, 0)
+    assert parse_color("purple") == (128, 0, 128)
+    assert parse_color("gray") == (190, 190, 190)
+
+
+@pytest.mark.parametrize("color", ["#12", "#gggggg", "no such color", ""])
+def test_reject_colors_tk_would_reject(color):
+    with pytest.raises(ValueError):
+        parse_color(color)
@@ -0,0 +1,42 @@
+"""
+Tests of the grid-based crowd separation
+"""
+import random
+import pytest
+from crowd import CrowdGrid
+
+
+def test_overlapping_bodies_are_pushed_apart_symmetrically():
+    dxs, dys = CrowdGrid(30).separate([100, 110], [50, 50], [20, 20], [1, 1])
+    assert dxs[0] < 0 < dxs[1] and dxs[0] == -dxs[1]
+    assert dys == [0.0, 0.0]
+
+
+def test_distant_and_weightless_bodies_stay_put():
+    grid = CrowdGrid(30)
+    assert grid.separate([100, 200], [50, 50], [20, 20], [1, 1]) == (
+        [0.0, 0.0], [0.0, 0.0])
+    assert grid.separate([100, 110], [50, 50], [20, 20], [1, 0]) == (
+        [0.0, 0.0], [0.0, 0.0])
+
+
+def test_incremental_grid_matches_a_fresh_one():
+    rng = random.Random(3)
+    xs = [rng.uniform(0, 300) for _ in range(200)]
+    ys = [rng.uniform(0, 300) for _ in range(200)]
+    sizes = [rng.choice((20, 30, 40)) for _ in range(200)]
+    weights = [rng.choice((0, 1)) for _ in range(200)]
+    grid = CrowdGrid(42)
+    for _ in range(5):
+        dxs, dys = grid.separate(xs, ys, sizes, weights)
+        fresh = CrowdGrid(42).separate(xs, ys, sizes, weights)
+        assert dxs == pytest.approx(fresh[0])
+        assert dys == pytest.approx(fresh[1])
+        for i in range(200):
+            xs[i] += dxs[i] + rng.uniform(-20, 20)
+            ys[i] += dys[i] + rng.uniform(-20, 20)
+
+
+def test_settings_are_exposed_for_copies():
+    grid = CrowdGrid(42, padding=3, strength=0.25)
+    assert (grid.cell_size, grid.padding, grid.strength) == (42, 3, 0.25)
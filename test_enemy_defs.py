@@ -0,0 +1,117 @@
+"""
+Tests of the enemy definitions compiled from enemies.json
+"""
+import random
+from collections import Counter
+import pytest
+from enemy_defs import BEHAVIORS, Arena, compile_definition, load_enemy_kinds
+
+
+def hand_coded_schedule(level: int) -> Counter:
+    """
+    Return the (delay, kind, count) waves that the hand-coded
+    EnemyGenerator.create_enemy() spawned before enemies.json existed
+    """
+    waves = Counter()
+    for _ in range(5):
+        waves[(0, "random_walk", level)] += 1
+    waves[(600, "chasing", int(level / 2))] += 1
+    waves[(0, "drunk_bouncy", level)] += 1
+    timer = 400
+    for _ in range(level):
+        waves[(timer, "random_walk", level)] += 1
+        waves[(timer // 2, "fencing", 1)] += 1
+        timer += timer
+    # waves without enemies spawned nothing
+    return Counter({wave: n for wave, n in waves.items() if wave[2] > 0})
+
+
+@pytest.mark.parametrize("level", range(0, 11))
+def test_schedule_matches_hand_coded_generator(level):
+    waves = Counter()
+    for name, kind in load_enemy_kinds().items():
+        for delay, count in kind.schedule(level):
+            waves[(delay, name, count)] += 1
+    assert waves == hand_coded_schedule(level)
+
+
+def test_schedule_is_ordered_by_delay():
+    for kind in load_enemy_kinds().values():
+        delays = [delay for delay, _ in kind.schedule(5)]
+        assert delays == sorted(delays)
+
+
+def test_only_wandering_enemies_draw_targets():
+    kinds = load_enemy_kinds()
+    arena = Arena(800, 500, (700, 250), random.Random(1))
+    state = arena.rng.getstate()
+    for name in ("chasing", "fencing", "drunk_bouncy"):
+        assert kinds[name].pick_target(arena) == (0, 0)
+    assert arena.rng.getstate() == state
+    x, y = kinds["random_walk"].pick_target(arena)
+    assert 0 <= x <= 800 and 0 <= y <= 500
+
+
+def test_target_use_follows_behavior_table(monkeypatch):
+    monkeypatch.setitem(BEHAVIORS, "homing",
+                        BEHAVIORS["chase"]._replace(uses_target=True))
+    kind = compile_definition(0, "homing", {"behavior": "homing"})
+    arena = Arena(800, 500, (700, 250), random.Random(1))
+    x, y = kind.pick_target(arena)
+    assert 0 <= x <= 800 and 0 <= y <= 500
+
+
+class Body:
+    """
+    A single enemy as the per-body behaviors see it
+    """
+
+    def __init__(self, x, y, state, target_x, target_y):
+        self.x, self.y, self.state = x, y, state
+        self.target_x, self.target_y = target_x, target_y
+
+
+class Columns:
+    """
+    Enemies of one kind as the batch behaviors see them
+    """
+
+    def __init__(self, bodies, size):
+        self.xs = [body.x for body in bodies]
+        self.ys = [body.y for body in bodies]
+        self.states = [body.state for body in bodies]
+        self.target_xs = [body.target_x for body in bodies]
+        self.target_ys = [body.target_y for body in bodies]
+        self.sizes = [size] * len(bodies)
+
+
+@pytest.mark.parametrize("name", ["random_walk", "chasing", "fencing",
+                                  "drunk_bouncy"])
+def test_batch_behaviors_match_stepping_bodies_one_by_one(name):
+    kind = load_enemy_kinds()[name]
+    arenas = [Arena(300, 200, (250, 100), random.Random(3)) for _ in range(2)]
+    for arena in arenas:
+        arena.track_player(50, 100)
+    rng = random.Random(4)
+    bodies = []
+    for _ in range(20):
+        x, y = kind.place(arenas[0])
+        target_x, target_y = kind.pick_target(arenas[0])
+        bodies.append(Body(x, y, kind.pick_state(rng), target_x, target_y))
+    arenas[1].rng.setstate(arenas[0].rng.getstate())
+    columns = Columns(bodies, 10)
+    for _ in range(100):
+        i = 0
+        while i < len(bodies):
+            body = bodies[i]
+            for x, y, state in kind.behavior(body, kind, arenas[0]) or ():
+                bodies.append(Body(x, y, state, 0, 0))
+            i += 1
+        kind.batch_behavior(columns, kind, arenas[1])
+    assert columns.xs == [body.x for body in bodies]
+    assert columns.ys == [body.y for body in bodies]
+    assert columns.states == [body.state for body in bodies]
+    assert columns.target_xs == [body.target_x for body in bodies]
+    assert columns.target_ys == [body.target_y for body in bodies]
+    assert columns.sizes == [10] * len(bodies)
+    assert arenas[0].rng.getstate() == arenas[1].rng.getstate()
@@ -0,0 +1,96 @@
+"""
+Tests of compiling and loading level files
+"""
+import random
+import struct
+import pytest
+from enemy_defs import load_enemy_kinds
+from levels import compile_level, default_layout, load_level
+
+LAYOUT = default_layout(800, 500)
+
+
+@pytest.fixture(name="level_path")
+def fixture_level_path(tmp_path):
+    path = str(tmp_path / "level5.lvl")
+    compile_level(path, 5, 42, LAYOUT)
+    return path
+
+
+def test_round_trip(level_path):
+    level = load_level(level_path)
+    try:
+        assert (level.level, level.seed, level.layout) == (5, 42, LAYOUT)
+        kinds = load_enemy_kinds()
+        waves = sorted((delay, kind.name, count)
+                       for kind in kinds.values()
+                       for delay, count in kind.schedule(5))
+        stored = sorted((delay, level.kinds[index].name, count)
+                        for delay, index, count in zip(level.wave_delays,
+                                                       level.wave_kinds,
+                                                       level.wave_counts))
+        assert stored == waves
+        assert level.enemy_count == sum(level.wave_counts)
+        for i in range(level.enemy_count):
+            assert 0 <= level.xs[i] <= LAYOUT.width
+            assert 0 <= level.ys[i] <= LAYOUT.height
+    finally:
+        level.close()
+
+
+def test_same_level_and_seed_give_identical_files(level_path, tmp_path):
+    again = str(tmp_path / "again.lvl")
+    other = str(tmp_path / "other.lvl")
+    compile_level(again, 5, 42, LAYOUT)
+    compile_level(other, 5, 43, LAYOUT)
+    with open(level_path, "rb") as first, open(again, "rb") as second, \
+            open(other, "rb") as third:
+        data = first.read()
+        assert data == second.read()
+        assert data != third.read()
+
+
+def test_playing_does_not_replay_the_compiler_draws(level_path):
+    level = load_level(level_path)
+    try:
+        compiler = random.Random(level.seed)
+        player = level.make_arena().rng
+        assert ([compiler.random() for _ in range(4)]
+                != [player.random() for _ in range(4)])
+    finally:
+        level.close()
+
+
+@pytest.mark.parametrize("seed", [-1, 2 ** 64])
+def test_reject_seeds_that_do_not_fit(tmp_path, seed):
+    with pytest.raises(ValueError):
+        compile_level(str(tmp_path / "bad.lvl"), 5, seed, LAYOUT)
+
+
+def test_reject_damaged_files(level_path, tmp_path):
+    with open(level_path, "rb") as file:
+        data = file.read()
+    truncated = tmp_path / "truncated.lvl"
+    truncated.write_bytes(data[:len(data) // 2])
+    foreign = tmp_path / "foreign.lvl"
+    foreign.write_bytes(b"XXXX" + data[4:])
+    level = load_level(level_path)
+    offsets = {}
+    for name in ("wave_kinds", "wave_counts"):
+        offsets[name] = data.index(getattr(level, name).tobytes())
+    kind_count = len(level.kinds)
+    level.close()
+    # a wave referring to a kind beyond the kind name table
+    bad_kind = tmp_path / "bad_kind.lvl"
+    offset = offsets["wave_kinds"]
+    bad_kind.write_bytes(data[:offset] + struct.pack("<I", kind_count)
+                         + data[offset + 4:])
+    # wave sizes that do not add up to the number of stored enemies
+    bad_count = tmp_path / "bad_count.lvl"
+    offset = offsets["wave_counts"]
+    (count,) = struct.unpack_from("<I", data, offset)
+    bad_count.write_bytes(data[:offset] + struct.pack("<I", count + 1)
+                          + data[offset + 4:])
+    for path in (truncated, foreign, bad_kind, bad_count):
+        with pytest.raises(ValueError):
+            load_level(str(path))
@@ -0,0 +1,39 @@
+"""
+Tests of the shared tick scheduler of GameHost
+"""
+from multigame import GameHost, HostedInstance
+
+
+class CountingInstance(HostedInstance):
+    """
+    An instance that runs for a limited number of ticks
+    """
+
+    def __init__(self, name: str, lifetime: int = 10 ** 9):
+        super().__init__(name)
+        self.lifetime = lifetime
+
+    @property
+    def is_running(self) -> bool:
+        return self.ticks < self.lifetime
+
+    def tick(self) -> None:
+        pass
+
+
+def test_rotation_stays_fair_after_an_instance_finishes():
+    # without any budget every round serves a single tick
+    host = GameHost(budget=0)
+    short = host.add(CountingInstance("short", lifetime=1))
+    others = [host.add(CountingInstance(name)) for name in "abc"]
+    host.run(301)
+    assert short.ticks == 1
+    assert [instance.ticks for instance in others] == [100, 100, 100]
+
+
+def test_all_instances_tick_every_round_within_budget():
+    host = GameHost(budget=1000)
+    instances = [host.add(CountingInstance(name)) for name in "abc"]
+    host.run(10)
+    assert [instance.ticks for instance in instances] == [10, 10, 10]
+    assert host.aggregate().overruns == 0
@@ -0,0 +1,51 @@
+"""
+Tests of the NumPy rasterizer
+"""
+import random
+import pytest
+
+np = pytest.importorskip("numpy")
+
+# pylint: disable=wrong-import-position
+from enemy_defs import Arena, load_enemy_kinds
+from simulation import GameState
+from rasterizer import Rasterizer, compare_frames
+
+
+def make_state() -> GameState:
+    arena = Arena(200, 100, (150, 50), random.Random(1))
+    arena.track_player(30, 50)
+    state = GameState(arena, player_speed=5, home_size=20)
+    state.add_enemy(load_enemy_kinds()["chasing"], 100, 50, 20, 0)
+    return state
+
+
+def test_compare_identical_frames():
+    frame = Rasterizer(200, 100).render(make_state()).copy()
+    diff = compare_frames(frame, frame.copy())
+    assert diff.matches and diff.max_delta == 0
+
+
+def test_compare_frames_reports_changed_pixels():
+    golden = Rasterizer(200, 100).render(make_state()).copy()
+    frame = golden.copy()
+    frame[10, 20] = [golden[10, 20, 0] ^ 0xFF, 0, 0]
+    diff = compare_frames(frame, golden)
+    assert diff.changed_pixels == 1 and diff.mask[10, 20]
+    assert compare_frames(frame, golden, tolerance=255).matches
+
+
+def test_compare_frames_rejects_other_shapes():
+    with pytest.raises(ValueError):
+        compare_frames(np.zeros((2, 2, 3)), np.zeros((3, 2, 3)))
+
+
+def test_render_does_not_depend_on_earlier_frames():
+    state = make_state()
+    turned = state.clone()
+    turned.step((30, 0))
+    rasterizer = Rasterizer(200, 100)
+    golden = rasterizer.render(state).copy()
+    rasterizer.render(turned)
+    assert compare_frames(rasterizer.render(state), golden).matches
+    assert not compare_frames(rasterizer.render(turned), golden).matches
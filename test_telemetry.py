@@ -0,0 +1,111 @@
+"""
+Tests of the Tk-free parts of the telemetry module
+"""
+import pytest
+import telemetry
+from gamelib import GameElement
+from telemetry import LatencyHistogram, LeakReport, LeakTelemetry
+
+
+class Item(GameElement):
+    """
+    A game element owning fixed canvas items
+    """
+
+    def __init__(self, game, items):
+        super().__init__(game)
+        self.items = items
+
+    def create(self) -> None:
+        pass
+
+    def update(self) -> None:
+        pass
+
+    def render(self) -> None:
+        pass
+
+    def delete(self) -> None:
+        pass
+
+    def canvas_items(self) -> tuple[int, ...]:
+        return self.items
+
+
+class FakeCanvas:
+    """
+    A canvas holding nothing but item ids
+    """
+
+    def __init__(self, items):
+        self.items = set(items)
+
+    def find_all(self) -> tuple[int, ...]:
+        return tuple(sorted(self.items))
+
+
+class FakeGame:
+    """
+    The parts of a Game that LeakTelemetry samples
+    """
+
+    def __init__(self, items):
+        self.canvas = FakeCanvas(items)
+        self.elements = []
+
+
+def make_report(registered, live):
+    return LeakReport(0.0, 0, (), (), registered, live, {}, 0.0)
+
+
+def test_detached_counts_live_elements_missing_from_the_registry():
+    report = make_report({"Player": 1, "Enemy": 3},
+                         {"Player": 1, "Enemy": 5, "Home": 1})
+    assert report.detached == {"Enemy": 2, "Home": 1}
+
+
+def test_sample_reconciles_canvas_items(monkeypatch):
+    monkeypatch.setattr(telemetry.time, "perf_counter", lambda: 10.0)
+    game = FakeGame([1, 2, 3, 4])
+    game.elements = [Item(game, (1, 2)), Item(game, (3, 5))]
+    report = LeakTelemetry(game).sample()
+    assert report.orphaned_items == (4,)
+    assert report.dangling_items == (5,)
+    assert report.registered == {"Item": 2}
+    assert report.live.get("Item", 0) >= 2
+
+
+def test_sample_computes_growth_per_second(monkeypatch):
+    clock = iter([10.0, 12.0])
+    monkeypatch.setattr(telemetry.time, "perf_counter", lambda: next(clock))
+    game = FakeGame([1])
+    game.elements = [Item(game, (1,))]
+    leaks = LeakTelemetry(game)
+    leaks.sample()
+    game.canvas.items.update([2, 3, 4, 5])
+    leaked = [Item(game, ()) for _ in range(4)]
+    report = leaks.sample()
+    assert report.item_growth == pytest.approx(2.0)
+    assert report.growth["Item"] == pytest.approx(2.0)
+    assert report.detached["Item"] >= len(leaked)
+    assert len(leaks.reports) == 2
+
+
+def test_histogram_percentiles_use_bucket_bounds():
+    histogram = LatencyHistogram((10, 20, 50))
+    for millis in (1, 5, 15, 15, 30, 80):
+        histogram.record(millis / 1000)
+    assert histogram.count == 6
+    assert histogram.percentile(0.3) == 10
+    assert histogram.percentile(0.5) == 20
+    assert histogram.percentile(0.8) == 50
+    # the overflow bucket reports the largest latency
+    assert histogram.percentile(1.0) == pytest.approx(80)
+    assert histogram.mean == pytest.approx(146 / 6)
+
+
+def test_empty_histogram_reports_zero():
+    histogram = LatencyHistogram()
+    assert histogram.count == 0
+    assert histogram.mean == 0.0
+    assert histogram.percentile(0.95) == 0
@@ -0,0 +1,50 @@
+"""
+Tests of the turtle_adventure module.  Tests that need a Tk window are skipped
+where no display is available.
+"""
+import tkinter as tk
+import pytest
+from turtle_adventure import TurtleAdventureGame, simplify_path
+
+
+@pytest.fixture(name="root")
+def fixture_root():
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        pytest.skip("no display available")
+    yield root
+    root.destroy()
+
+
+def test_simplify_path_keeps_short_paths():
+    assert simplify_path([]) == []
+    assert simplify_path([(0, 0), (5, 5)]) == [(0, 0), (5, 5)]
+
+
+def test_simplify_path_drops_points_near_a_straight_line():
+    points = [(x, 0.5 * (x % 2)) for x in range(0, 101, 10)]
+    assert simplify_path(points, tolerance=1) == [(0, 0), (100, 0)]
+
+
+def test_simplify_path_keeps_corners():
+    points = [(0, 0), (50, 1), (100, 0), (100, 50), (101, 100)]
+    assert simplify_path(points, tolerance=4) == [(0, 0), (100, 0),
+                                                  (101, 100)]
+
+
+def test_simplify_path_handles_closed_loops():
+    points = [(0, 0), (100, 0), (100, 100), (0, 0)]
+    assert simplify_path(points, tolerance=4) == points
+
+
+@pytest.mark.parametrize("hosted", [False, True])
+def test_init_game_keeps_items_of_other_elements(root, hosted):
+    # pylint: disable=import-outside-toplevel
+    from turtle_screens import HostedScreen
+
+    game = TurtleAdventureGame(root, 800, 500,
+                               screen_factory=HostedScreen if hosted else None)
+    on_canvas = set(game.canvas.find_all())
+    for element in (game.home, game.waypoint, game.player):
+        assert set(element.canvas_items()) <= on_canvas
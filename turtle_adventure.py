@@ -2,10 +2,55 @@
 The turtle_adventure module maintains all classes related to the Turtle's
 adventure game.
 """
-import random
+import math
 import time
-from turtle import RawTurtle
+import tkinter as tk
+from collections import deque
+from typing import Callable, Final, Optional, TYPE_CHECKING
 from gamelib import Game, GameElement
+from enemy_defs import Arena, EnemyKind, load_enemy_kinds
+from telemetry import LatencyHistogram
+from crowd import CrowdGrid, make_crowd_grid
+from levels import CompiledLevel, default_layout
+
+if TYPE_CHECKING:
+    from turtle import RawTurtle, TurtleScreen
+
+# distance in pixels below which dragged path points are merged
+PATH_TOLERANCE: Final = 4
+
+
+def simplify_path(points: list[tuple[float, float]],
+                  tolerance: float = PATH_TOLERANCE
+                  ) -> list[tuple[float, float]]:
+    """
+    Simplify a polyline with the Ramer-Douglas-Peucker algorithm, dropping
+    points that are closer than tolerance to the simplified line.
+    """
+    if len(points) < 3:
+        return list(points)
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        (x1, y1), (x2, y2) = points[first], points[last]
+        dx, dy = x2 - x1, y2 - y1
+        length = math.hypot(dx, dy)
+        farthest, index = -1.0, first
+        for i in range(first + 1, last):
+            px, py = points[i]
+            if length:
+                distance = abs(dy * (px - x1) - dx * (py - y1)) / length
+            else:
+                distance = math.hypot(px - x1, py - y1)
+            if distance > farthest:
+                farthest, index = distance, i
+        if farthest > tolerance:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    return [point for point, kept in zip(points, keep) if kept]
 
 
 class TurtleGameElement(GameElement):
@@ -28,22 +73,31 @@ class TurtleGameElement(GameElement):
 
 class Waypoint(TurtleGameElement):
     """
-    Represent the waypoint to which the player will move.
+    Represent the waypoint to which the player will move, optionally followed
+    by more points queued up as a path.
     """
 
     def __init__(self, game: "TurtleAdventureGame"):
         super().__init__(game)
         self.__id1: int
         self.__id2: int
+        self.__path_id: int
         self.__active: bool = False
+        self.__queue: deque[tuple[float, float]] = deque()
 
     def create(self) -> None:
         self.__id1 = self.canvas.create_line(0, 0, 0, 0, width=2, fill="green")
         self.__id2 = self.canvas.create_line(0, 0, 0, 0, width=2, fill="green")
+        self.__path_id = self.canvas.create_line(0, 0, 0, 0, fill="green",
+                                                 dash=(4, 4), state="hidden")
 
     def delete(self) -> None:
         self.canvas.delete(self.__id1)
         self.canvas.delete(self.__id2)
+        self.canvas.delete(self.__path_id)
+
+    def canvas_items(self) -> tuple[int, ...]:
+        return self.__id1, self.__id2, self.__path_id
 
     def update(self) -> None:
         # there is nothing to update because a waypoint is fixed
@@ -62,19 +116,51 @@ class Waypoint(TurtleGameElement):
         else:
             self.canvas.itemconfigure(self.__id1, state="hidden")
             self.canvas.itemconfigure(self.__id2, state="hidden")
+        if self.is_active and self.__queue:
+            coords = [self.x, self.y]
+            for x, y in self.__queue:
+                coords += [x, y]
+            self.canvas.coords(self.__path_id, *coords)
+            self.canvas.itemconfigure(self.__path_id, state="normal")
+        else:
+            self.canvas.itemconfigure(self.__path_id, state="hidden")
 
     def activate(self, x: float, y: float) -> None:
         """
-        Activate this waypoint with the specified location.
+        Activate this waypoint with the specified location, dropping any
+        queued path.
         """
+        self.__queue.clear()
         self.__active = True
         self.x = x
         self.y = y
 
+    def set_path(self, points: list[tuple[float, float]]) -> None:
+        """
+        Activate this waypoint at the first of the given points and queue up
+        the remaining ones.
+        """
+        if not points:
+            self.deactivate()
+            return
+        self.activate(*points[0])
+        self.__queue.extend(points[1:])
+
+    def advance(self) -> None:
+        """
+        Move on to the next queued point, or deactivate this waypoint if the
+        path is exhausted.
+        """
+        if self.__queue:
+            self.x, self.y = self.__queue.popleft()
+        else:
+            self.deactivate()
+
     def deactivate(self) -> None:
         """
         Mark this waypoint as inactive.
         """
+        self.__queue.clear()
         self.__active = False
 
     @property
@@ -84,6 +170,13 @@ class Waypoint(TurtleGameElement):
         """
         return self.__active
 
+    @property
+    def path(self) -> list[tuple[float, float]]:
+        """
+        Get the points queued after the current one.
+        """
+        return list(self.__queue)
+
 
 class Home(TurtleGameElement):
     """
@@ -117,6 +210,9 @@ class Home(TurtleGameElement):
     def delete(self) -> None:
         self.canvas.delete(self.__id)
 
+    def canvas_items(self) -> tuple[int, ...]:
+        return (self.__id,)
+
     def update(self) -> None:
         # there is nothing to update, unless home is allowed to moved
         pass
@@ -144,20 +240,25 @@ class Player(TurtleGameElement):
 
     def __init__(self,
                  game: "TurtleAdventureGame",
-                 turtle: RawTurtle,
+                 turtle: "RawTurtle",
                  speed: float = 5):
         super().__init__(game)
         self.__speed: float = speed
-        self.__turtle: RawTurtle = turtle
+        self.__turtle: "RawTurtle" = turtle
+        self.__items: tuple[int, ...] = ()
+        self.__screen_items: tuple[int, ...] = ()
+        self.__stepped_ahead: bool = False
 
     def create(self) -> None:
-        turtle = RawTurtle(self.canvas)
-        turtle.getscreen().tracer(False)  # disable turtle's built-in animation
+        turtle = self.__turtle
         turtle.shape("turtle")
         turtle.color("black")
         turtle.penup()
-
-        self.__turtle = turtle
+        self.__items = _turtle_items(turtle)
+        # the player owns the turtle screen, so it also claims the screen's
+        # background image, which lives as long as the canvas does
+        # pylint: disable=protected-access
+        self.__screen_items = (turtle.screen._bgpic,)
 
     @property
     def speed(self) -> float:
@@ -171,23 +272,63 @@ class Player(TurtleGameElement):
         self.__speed = val
 
     def delete(self) -> None:
-        pass
+        self.__turtle.hideturtle()
+        for item in self.__items:
+            self.canvas.delete(item)
+        self.__items = ()
+
+    def canvas_items(self) -> tuple[int, ...]:
+        return self.__items + self.__screen_items
 
     def update(self) -> None:
         # check if player has arrived home
         if self.game.home.contains(self.x, self.y):
             self.game.game_over_win()
+        if self.__stepped_ahead:
+            # this tick's step has already been taken in response to input
+            self.__stepped_ahead = False
+        else:
+            self.__step()
+        self.game.arena.track_player(self.x, self.y)
+
+    def step_ahead(self) -> None:
+        """
+        Take the step of the next tick right away, e.g., in response to
+        input.  The next update() then does not move the player, so stepping
+        ahead never makes the player faster.
+        """
+        if not self.__stepped_ahead:
+            self.__step()
+            self.__stepped_ahead = True
+            self.game.arena.track_player(self.x, self.y)
+
+    def __step(self) -> None:
         turtle = self.__turtle
         waypoint = self.game.waypoint
-        if self.game.waypoint.is_active:
+        if waypoint.is_active:
             turtle.setheading(turtle.towards(waypoint.x, waypoint.y))
             turtle.forward(self.speed)
             if turtle.distance(waypoint.x, waypoint.y) < self.speed:
-                waypoint.deactivate()
+                waypoint.advance()
 
     def render(self) -> None:
         self.__turtle.goto(self.x, self.y)
         self.__turtle.getscreen().update()
+        self.game.player_rendered()
+
+    @property
+    def heading(self) -> float:
+        """
+        Get the direction the player faces, in degrees from the x axis
+        towards the y axis of the canvas
+        """
+        return self.__turtle.heading()
+
+    def face(self, x: float, y: float) -> None:
+        """
+        Turn the player towards the point (x, y) without moving.
+        """
+        self.__turtle.setheading(self.__turtle.towards(x, y))
 
     # override original property x's getter/setter to use turtle's methods
     # instead
@@ -210,6 +351,16 @@ class Player(TurtleGameElement):
         self.__turtle.sety(val)
 
 
+def _turtle_items(turtle: "RawTurtle") -> tuple[int, ...]:
+    # turtle creates its canvas items internally; pick out the ones that
+    # belong to the turtle itself and not to its screen, e.g., the
+    # screen's background image, which must outlive the turtle
+    # pylint: disable=protected-access
+    shape = turtle.turtle._item
+    shapes = shape if isinstance(shape, list) else [shape]
+    return (turtle.drawingLineItem, *turtle.items, *shapes)
+
+
 class Enemy(TurtleGameElement):
     """
     Define an abstract enemy for the Turtle's adventure game
@@ -283,52 +434,58 @@ class DemoEnemy(Enemy):
     def delete(self) -> None:
         self.canvas.delete(self.__id)
 
+    def canvas_items(self) -> tuple[int, ...]:
+        return (self.__id,)
+
 
-class RandomWalkEnemy(Enemy):
+class DefinedEnemy(Enemy):
     """
-    Randomly walk enemy
+    Enemy whose appearance and behavior are driven by a compiled definition
+    from enemies.json
     """
 
+    # pylint: disable=too-many-arguments
     def __init__(self,
                  game: "TurtleAdventureGame",
-                 size: int,
-                 color: str):
-        super().__init__(game, size, color)
+                 kind: EnemyKind,
+                 size: Optional[int] = None,
+                 color: Optional[str] = None,
+                 pos: Optional[tuple[float, float]] = None,
+                 state: Optional[int] = None):
+        rng = game.arena.rng
+        super().__init__(game,
+                         size if size is not None else rng.choice(kind.sizes),
+                         color if color is not None else kind.color)
         self.__id = None
-        self.waypoint = Waypoint(self.game)
-        self.generate_waypoint()
+        self.__kind: EnemyKind = kind
+        self.__pos: Optional[tuple[float, float]] = pos
+        self.state: int = state if state is not None else kind.pick_state(rng)
+        self.target_x: float
+        self.target_y: float
+        self.target_x, self.target_y = kind.pick_target(game.arena)
+
+    @property
+    def kind(self) -> EnemyKind:
+        """
+        Get the compiled definition of this enemy
+        """
+        return self.__kind
 
     def create(self) -> None:
-        self.__id = self.canvas.create_oval(0, 0, 0, 0, fill=self.color)
-        if self.x == 0 and self.y == 0:
-            self.random_spawn()
-
-    def random_spawn(self):
-        num_x = random.randint(0, self.canvas.winfo_width())
-        num_y = random.randint(0, self.canvas.winfo_height())
-        while (self.game.player.x - 100 < num_x < self.game.player.x + 100 or
-               self.game.player.y - 100 < num_y < self.game.player.y + 100):
-            num_x = random.randint(0, self.canvas.winfo_width())
-            num_y = random.randint(0, self.canvas.winfo_height())
-        self.x = num_x
-        self.y = num_y
-
-    def generate_waypoint(self):
-        num_x = random.randint(0, self.canvas.winfo_width())
-        num_y = random.randint(0, self.canvas.winfo_height())
-        self.waypoint.activate(num_x, num_y)
+        self.__id = self.__kind.create_item(self.canvas, 0, 0, 0, 0,
+                                            fill=self.color,
+                                            outline=self.__kind.outline)
+        self.x, self.y = (self.__pos if self.__pos is not None
+                          else self.__kind.place(self.game.arena))
 
     def update(self) -> None:
-        if self.x < self.waypoint.x:
-            self.x += 1
-        elif self.x > self.waypoint.x:
-            self.x -= 1
-        if self.y < self.waypoint.y:
-            self.y += 1
-        elif self.y > self.waypoint.y:
-            self.y -= 1
-        if self.x == self.waypoint.x and self.y == self.waypoint.y:
-            self.generate_waypoint()
+        kind = self.__kind
+        spawns = kind.behavior(self, kind, self.game.arena)
+        if spawns:
+            for x, y, state in spawns:
+                self.game.add_enemy(DefinedEnemy(self.game, kind,
+                                                 self.size, self.color,
+                                                 pos=(x, y), state=state))
         if self.hits_player():
             self.game.game_over_lose()
 
@@ -342,70 +499,35 @@ class RandomWalkEnemy(Enemy):
     def delete(self) -> None:
         self.canvas.delete(self.__id)
 
+    def canvas_items(self) -> tuple[int, ...]:
+        return (self.__id,)
+
 
-class ChasingEnemy(Enemy):
+class RandomWalkEnemy(DefinedEnemy):
     """
-    Chasing square enemy that walk faster when you are far away
+    Randomly walk enemy
     """
 
     def __init__(self,
                  game: "TurtleAdventureGame",
                  size: int,
                  color: str):
-        super().__init__(game, size, color)
-        self.__id = None
+        super().__init__(game, load_enemy_kinds()["random_walk"], size, color)
 
-    def create(self) -> None:
-        self.__id = self.canvas.create_rectangle(0, 0, 0, 0, fill=self.color)
-        if self.x == 0 and self.y == 0:
-            self.random_spawn()
-
-    def random_spawn(self):
-        num_x = random.randint(0, self.canvas.winfo_width())
-        num_y = random.randint(0, self.canvas.winfo_height())
-        while (self.game.player.x - 100 < num_x < self.game.player.x + 100 or
-               self.game.player.y - 100 < num_y < self.game.player.y + 100):
-            num_x = random.randint(0, self.canvas.winfo_width())
-            num_y = random.randint(0, self.canvas.winfo_height())
-        self.x = num_x
-        self.y = num_y
-
-    def update(self) -> None:
-        player_pos_x = self.game.player.x
-        player_pos_y = self.game.player.y
 
-        if abs(player_pos_x - self.x) > 80:
-            speed_x = 5
-        else:
-            speed_x = 2
-        if abs(player_pos_y - self.y) > 80:
-            speed_y = 5
-        else:
-            speed_y = 2
-
-        if player_pos_x > self.x:
-            self.x += speed_x
-        elif player_pos_x < self.x:
-            self.x -= speed_x
-        if player_pos_y > self.y:
-            self.y += speed_y
-        elif player_pos_y < self.y:
-            self.y -= speed_y
-        if self.hits_player():
-            self.game.game_over_lose()
-
-    def render(self) -> None:
-        self.canvas.coords(self.__id,
-                           self.x - self.size / 2,
-                           self.y - self.size / 2,
-                           self.x + self.size / 2,
-                           self.y + self.size / 2)
+class ChasingEnemy(DefinedEnemy):
+    """
+    Chasing square enemy that walk faster when you are far away
+    """
 
-    def delete(self) -> None:
-        self.canvas.delete(self.__id)
+    def __init__(self,
+                 game: "TurtleAdventureGame",
+                 size: int,
+                 color: str):
+        super().__init__(game, load_enemy_kinds()["chasing"], size, color)
 
 
-class FencingEnemy(Enemy):
+class FencingEnemy(DefinedEnemy):
     """
     Fencing enemy wondering around the finish line
     """
@@ -414,160 +536,42 @@ class FencingEnemy(Enemy):
                  game: "TurtleAdventureGame",
                  size: int,
                  color: str):
-        super().__init__(game, size, color)
-        self.__id = None
-        self.__state = self.down
-        self.enemy_num = 1
-        self.speed = 5
-        self.distance_x, self.distance_y = 40, 40
-        self.rad_x, self.rad_y = 40, 40
-        self.finish_x = self.game.home.x
-        self.finish_y = self.game.home.y
-
-    def create(self) -> None:
-        self.__id = self.canvas.create_oval(0, 0, 0, 0, fill=self.color,
-                                            outline='black')
-        self.x = self.game.home.x - self.distance_x
-        self.y = self.game.home.y - self.distance_y
-
-    def left(self) -> None:
-        if self.x == self.finish_x - self.rad_x:
-            self.__state = self.down
-        self.x -= self.speed
-
-    def right(self) -> None:
-        if self.x == self.finish_x + self.rad_x:
-            self.__state = self.up
-        self.x += self.speed
+        super().__init__(game, load_enemy_kinds()["fencing"], size, color)
 
-    def up(self) -> None:
-        if self.y == self.finish_y - self.rad_y:
-            self.__state = self.left
-        self.y -= self.speed
 
-    def down(self) -> None:
-        if self.y == self.finish_y + self.rad_y:
-            self.__state = self.right
-        self.y += self.speed
-
-    def update(self) -> None:
-        self.__state()
-        if self.hits_player():
-            self.game.game_over_lose()
-
-    def render(self) -> None:
-        self.canvas.coords(self.__id,
-                           self.x - self.size / 2,
-                           self.y - self.size / 2,
-                           self.x + self.size / 2,
-                           self.y + self.size / 2)
-
-    def delete(self) -> None:
-        self.canvas.delete(self.__id)
-
-
-class DrunkBouncyEnemy(Enemy):
+class DrunkBouncyEnemy(DefinedEnemy):
     """
-    Randomly walk enemy
+    Enemy walking diagonally that splits into two whenever it hits a wall
     """
 
     def __init__(self,
                  game: "TurtleAdventureGame",
                  size: int,
                  color: str):
-        super().__init__(game, size, color)
-        self.x_state = random.choice([self.left_state, self.right_state])
-        self.y_state = random.choice([self.up_state, self.down_state])
-        self.speed = 3
-        self.__id = None
-
-    def create(self) -> None:
-        self.__id = self.canvas.create_oval(0, 0, 0, 0, fill=self.color)
-        if self.x == 0 and self.y == 0:
-            self.random_spawn()
-
-    def random_spawn(self):
-        num_x = random.randint(0, self.canvas.winfo_width())
-        num_y = random.randint(0, self.canvas.winfo_height())
-        while (self.game.player.x - 100 < num_x < self.game.player.x + 100 or
-               self.game.player.y - 100 < num_y < self.game.player.y + 100):
-            num_x = random.randint(0, self.canvas.winfo_width())
-            num_y = random.randint(0, self.canvas.winfo_height())
-        self.x = num_x
-        self.y = num_y
-
-    def create_dupe(self, x_state, y_state):
-        new_enemy = DrunkBouncyEnemy(self.game, 10, "pink")
-        new_enemy.x_state = eval(f"new_enemy.{x_state}")
-        new_enemy.y_state = eval(f"new_enemy.{y_state}")
-        if self.x <= 0:
-            new_enemy.x = 1
-            new_enemy.y = self.y
-        elif self.x >= self.canvas.winfo_width():
-            new_enemy.x = self.canvas.winfo_width() - 1
-            new_enemy.y = self.y
-        elif self.y <= 0:
-            new_enemy.y = 1
-            new_enemy.x = self.x
-        elif self.y >= self.canvas.winfo_height():
-            new_enemy.y = self.canvas.winfo_height() - 1
-            new_enemy.x = self.x
-        self.game.add_element(new_enemy)
-
-    def update(self) -> None:
-        self.x_state()
-        self.y_state()
-        if self.hits_player():
-            self.game.game_over_lose()
-
-    def left_state(self):
-        self.x -= self.speed
-        if self.x <= 0:
-            self.create_dupe("right_state", "up_state")
-            self.create_dupe("right_state", "down_state")
-            self.game.delete_element(self)
-
-    def right_state(self):
-        self.x += self.speed
-        if self.x >= self.canvas.winfo_width():
-            self.create_dupe("left_state", "up_state")
-            self.create_dupe("left_state", "down_state")
-            self.game.delete_element(self)
-
-    def up_state(self):
-        self.y -= self.speed
-        if self.y <= 0:
-            self.create_dupe("left_state", "down_state")
-            self.create_dupe("right_state", "down_state")
-            self.game.delete_element(self)
-
-    def down_state(self):
-        self.y += self.speed
-        if self.y >= self.canvas.winfo_height():
-            self.create_dupe("left_state", "up_state")
-            self.create_dupe("right_state", "up_state")
-            self.game.delete_element(self)
-
-    def render(self) -> None:
-        self.canvas.coords(self.__id,
-                           self.x - self.size / 2,
-                           self.y - self.size / 2,
-                           self.x + self.size / 2,
-                           self.y + self.size / 2)
-
-    def delete(self) -> None:
-        self.canvas.delete(self.__id)
+        super().__init__(game, load_enemy_kinds()["drunk_bouncy"], size, color)
 
 
 class EnemyGenerator:
     """
     An EnemyGenerator instance is responsible for creating enemies of various
-    kinds and scheduling them to appear at certain points in time.
+    kinds and scheduling them to appear at certain points in time, either
+    rolling them at runtime or replaying a compiled level.
     """
 
-    def __init__(self, game: "TurtleAdventureGame", level: int):
+    def __init__(self, game: "TurtleAdventureGame", level: int,
+                 kinds: Optional[dict[str, EnemyKind]] = None,
+                 compiled: Optional[CompiledLevel] = None):
         self.__game: TurtleAdventureGame = game
         self.__level: int = level
+        self.__kinds: dict[str, EnemyKind] = (kinds if kinds is not None
+                                              else load_enemy_kinds())
+        self.__compiled: Optional[CompiledLevel] = compiled
+        # (delay, kind, count, first row in the compiled level or None if the
+        # wave is rolled at runtime) of the waves that have not appeared yet
+        self.__pending: list[tuple[int, EnemyKind, int, Optional[int]]] = []
+        # time from which the delays count if the game was already running
+        # when the waves were scheduled
+        self.__origin: Optional[float] = None
         self.create_enemy()
 
     @property
@@ -584,46 +588,87 @@ class EnemyGenerator:
         """
         return self.__level
 
-    def create_enemy(self) -> None:
-        for i in range(5):
-            self.create_random_enemy()
-        self.game.after(600, self.create_chasing_enemy)
-        self.create_my_enemy()
-        timer = 400
-        for i in range(self.level):
-            self.game.after(timer, self.create_random_enemy)
-            self.game.after(timer // 2, self.create_fencing_enemy)
-            timer += timer
-
-    def create_my_enemy(self) -> None:
-        for enemy_num in range(self.level):
-            new_enemy = DrunkBouncyEnemy(self.__game, 10, "pink")
-            self.game.add_element(new_enemy)
-
-    def create_random_enemy(self) -> None:
+    @property
+    def kinds(self) -> dict[str, EnemyKind]:
         """
-        Create a random walk enemy, possibly based on the game level
+        Get the enemy definitions this generator spawns from
         """
-        for enemy_num in range(self.level):
-            size = random.choice([20, 30, 40])
-            new_enemy = RandomWalkEnemy(self.__game, size, "#AFD198")
-            self.game.add_element(new_enemy)
+        return self.__kinds
 
-    def create_chasing_enemy(self) -> None:
+    @property
+    def compiled(self) -> Optional[CompiledLevel]:
         """
-        Create a chasing enemy, possibly based on the game level
+        Get the compiled level this generator replays, if any
         """
-        for enemy_num in range(int(self.level / 2)):
-            size = random.choice([20, 30, 40])
-            new_enemy = ChasingEnemy(self.__game, size, "#8644A2")
-            self.game.add_element(new_enemy)
+        return self.__compiled
 
-    def create_fencing_enemy(self) -> None:
-        """
-        Create four fencing enemies on each corner.
+    @property
+    def pending(self) -> list[tuple[float, EnemyKind, int, Optional[int]]]:
+        """
+        Get (due time, kind, count, first row) of the spawn waves that have
+        not appeared yet, ordered by due time.  Waves of a compiled level
+        spawn the count enemies stored in the level from its first row on;
+        other waves have no first row and are rolled when they are due.  Due
+        times use time.perf_counter()'s clock; before the game starts they
+        assume that it starts right now.
+        """
+        origin = self.__origin
+        if origin is None:
+            origin = (self.game.started_at if self.game.is_started
+                      else time.perf_counter())
+        return sorted(((origin + delay / 1000, kind, count, first)
+                       for delay, kind, count, first in self.__pending),
+                      key=lambda wave: wave[0])
+
+    def create_enemy(self) -> None:
         """
-        new_enemy = FencingEnemy(self.__game, 20, "red")
-        self.game.add_element(new_enemy)
+        Schedule all spawn waves of every enemy definition.  Enemies are only
+        constructed when their wave is due, so even the initial waves do not
+        delay the first frame, and waves still due are cancelled when the game
+        stops.
+        """
+        # schedule() defers the delays until the game starts
+        self.__origin = time.perf_counter() if self.game.is_started else None
+        compiled = self.__compiled
+        if compiled is not None:
+            first = 0
+            for delay, index, count in zip(compiled.wave_delays,
+                                           compiled.wave_kinds,
+                                           compiled.wave_counts):
+                wave = (delay, compiled.kinds[index], count, first)
+                self.__pending.append(wave)
+                self.game.schedule(delay, self.__spawn_compiled, wave)
+                first += count
+            return
+        for kind in self.__kinds.values():
+            for delay, count in kind.schedule(self.level):
+                wave = (delay, kind, count, None)
+                self.__pending.append(wave)
+                self.game.schedule(delay, self.__spawn_wave, wave)
+
+    def __spawn_wave(self, wave: tuple[int, EnemyKind, int, None]) -> None:
+        self.__pending.remove(wave)
+        _, kind, count, _ = wave
+        self.spawn(kind, count)
+
+    def __spawn_compiled(self, wave: tuple[int, EnemyKind, int, int]) -> None:
+        self.__pending.remove(wave)
+        _, kind, count, first = wave
+        compiled = self.__compiled
+        for i in range(first, first + count):
+            enemy = DefinedEnemy(self.__game, kind, compiled.sizes[i],
+                                 pos=(compiled.xs[i], compiled.ys[i]),
+                                 state=compiled.states[i])
+            enemy.target_x = compiled.target_xs[i]
+            enemy.target_y = compiled.target_ys[i]
+            self.game.add_enemy(enemy)
+
+    def spawn(self, kind: EnemyKind, count: int) -> None:
+        """
+        Create count enemies of the given kind
+        """
+        for _ in range(count):
+            self.game.add_enemy(DefinedEnemy(self.__game, kind))
 
 
 class TurtleAdventureGame(Game):  # pylint: disable=too-many-ancestors
@@ -631,41 +676,149 @@ class TurtleAdventureGame(Game):  # pylint: disable=too-many-ancestors
     The main class for Turtle's Adventure.
     """
 
-    # pylint: disable=too-many-instance-attributes
+    # pylint: disable=too-many-instance-attributes,too-many-arguments
     def __init__(self, parent, screen_width: int, screen_height: int,
-                 level: int = 1):
-        self.level: int = level
+                 level: int = 1, immediate_input: bool = True,
+                 screen_factory: Optional[Callable[[tk.Canvas],
+                                                   "TurtleScreen"]] = None,
+                 compiled_level: Optional[CompiledLevel] = None):
+        # a compiled level brings its own level number, layout and enemies
+        self.compiled_level: Optional[CompiledLevel] = compiled_level
+        self.level: int = (compiled_level.level if compiled_level is not None
+                           else level)
         self.screen_width: int = screen_width
         self.screen_height: int = screen_height
+        self.immediate_input: bool = immediate_input
+        # creates the turtle screen for the player's canvas, if the default
+        # screen of the turtle module is not wanted
+        self.screen_factory = screen_factory
+        self.input_latency: LatencyHistogram = LatencyHistogram()
         self.waypoint: Waypoint
         self.player: Player
         self.home: Home
         self.enemies: list[Enemy] = []
+        self.arena: Arena
+        self.crowd: CrowdGrid
         self.enemy_generator: EnemyGenerator
+        self.__input_time: Optional[float] = None
+        self.__input_pos: tuple[float, float] = (0, 0)
+        self.__drag: list[tuple[float, float]] = []
         super().__init__(parent)
 
     def init_game(self):
         self.canvas.config(width=self.screen_width, height=self.screen_height)
-        turtle = RawTurtle(self.canvas)
-        # set turtle screen's origin to the top-left corner
-        turtle.screen.setworldcoordinates(0, self.screen_height - 1,
-                                          self.screen_width - 1, 0)
 
+        # constructing a turtle screen clears the whole canvas, so the
+        # player's turtle has to exist before any other element draws on it
+        turtle = self.__create_turtle()
+
+        compiled = self.compiled_level
+        layout = (compiled.layout if compiled is not None
+                  else default_layout(self.screen_width, self.screen_height))
         self.waypoint = Waypoint(self)
         self.add_element(self.waypoint)
-        self.home = Home(self,
-                         (self.screen_width - 100, self.screen_height // 2),
-                         20)
+        self.home = Home(self, (layout.home_x, layout.home_y),
+                         layout.home_size)
         self.add_element(self.home)
         self.player = Player(self, turtle)
         self.add_element(self.player)
-        self.canvas.bind("<Button-1>",
-                         lambda e: self.waypoint.activate(e.x, e.y))
-
-        self.enemy_generator = EnemyGenerator(self, level=self.level)
-
-        self.player.x = 50
-        self.player.y = self.screen_height // 2
+        self.canvas.bind("<Button-1>", self.__on_press)
+        self.canvas.bind("<B1-Motion>", self.__on_drag)
+        self.canvas.bind("<ButtonRelease-1>", self.__on_release)
+
+        self.player.x = layout.player_x
+        self.player.y = layout.player_y
+        if compiled is not None:
+            self.arena = compiled.make_arena()
+        else:
+            self.arena = Arena(self.screen_width, self.screen_height,
+                               (self.home.x, self.home.y))
+            self.arena.track_player(self.player.x, self.player.y)
+
+        self.enemy_generator = EnemyGenerator(self, level=self.level,
+                                              compiled=compiled)
+        self.crowd = make_crowd_grid(self.enemy_generator.kinds.values())
+
+    def __create_turtle(self) -> "RawTurtle":
+        # the turtle module is slow to import, so only load it when a game is
+        # set up; Tk-free users of this module, e.g., the simulation, never
+        # pay for it
+        # pylint: disable=import-outside-toplevel
+        from turtle import RawTurtle
+        from turtle_screens import IdleScreen
+
+        factory = self.screen_factory or IdleScreen
+        turtle = RawTurtle(factory(self.canvas))
+        turtle.getscreen().tracer(False)  # disable turtle's built-in animation
+        # set turtle screen's origin to the top-left corner
+        turtle.screen.setworldcoordinates(0, self.screen_height - 1,
+                                          self.screen_width - 1, 0)
+        return turtle
+
+    def tick(self) -> None:
+        self.__separate_enemies()
+        super().tick()
+
+    def __separate_enemies(self) -> None:
+        enemies = self.enemies
+        weights = [enemy.kind.separation if isinstance(enemy, DefinedEnemy)
+                   else 0 for enemy in enemies]
+        dxs, dys = self.crowd.separate([enemy.x for enemy in enemies],
+                                       [enemy.y for enemy in enemies],
+                                       [enemy.size for enemy in enemies],
+                                       weights)
+        for enemy, dx, dy in zip(enemies, dxs, dys):
+            if dx or dy:
+                enemy.x += dx
+                enemy.y += dy
+
+    def __on_press(self, event) -> None:
+        self.__start_latency_sample()
+        self.__drag = [(event.x, event.y)]
+        self.waypoint.activate(event.x, event.y)
+        self.__respond_to_input()
+
+    def __on_drag(self, event) -> None:
+        last_x, last_y = self.__drag[-1]
+        if math.hypot(event.x - last_x, event.y - last_y) >= PATH_TOLERANCE:
+            self.__drag.append((event.x, event.y))
+
+    def __on_release(self, _event) -> None:
+        points = simplify_path(self.__drag)
+        self.__drag = []
+        if len(points) < 2:
+            return
+        # keep heading for the press point unless it has been reached already
+        waypoint = self.waypoint
+        if not (waypoint.is_active and (waypoint.x, waypoint.y) == points[0]):
+            points = points[1:]
+        self.__start_latency_sample()
+        waypoint.set_path(points)
+        self.__respond_to_input()
+
+    def __start_latency_sample(self) -> None:
+        self.__input_time = time.perf_counter()
+        self.__input_pos = (self.player.x, self.player.y)
+
+    def __respond_to_input(self) -> None:
+        # show the new waypoint and move the player towards it right away
+        # instead of waiting for the next tick
+        if self.immediate_input and self.is_started:
+            self.waypoint.render()
+            self.player.step_ahead()
+            self.player.render()
+
+    def player_rendered(self) -> None:
+        """
+        Called by the player after redrawing itself.  Completes the latency
+        measurement of the latest input once the player has been drawn at a
+        position other than where it was when the input arrived.
+        """
+        if (self.__input_time is not None
+                and (self.player.x, self.player.y) != self.__input_pos):
+            started, self.__input_time = self.__input_time, None
+            self.after_idle(lambda: self.input_latency.record(
+                time.perf_counter() - started))
 
     def add_enemy(self, enemy: Enemy) -> None:
         """
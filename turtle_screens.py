@@ -0,0 +1,43 @@
+"""
+The turtle_screens module contains turtle screens tailored to the Turtle's
+Adventure game.  It imports the turtle module, which is slow to import, so
+it is only imported once a player's turtle is about to be created.
+"""
+import tkinter as tk
+from typing import Optional
+from turtle import TurtleScreen
+
+
+class IdleScreen(TurtleScreen):
+    """
+    A turtle screen that leaves redrawing the canvas to Tk's idle processing
+    instead of running a full pass of the event loop on every update, so
+    that updating it from an event handler or a timer never runs other
+    handlers nested inside.
+    """
+
+    def _update(self):
+        self.cv.update_idletasks()
+
+
+class HostedScreen(TurtleScreen):
+    """
+    A turtle screen that leaves flushing the canvas to the GameHost, which
+    does it once per round for all games, and that shares its shape registry
+    with all other hosted screens.
+    """
+
+    __shared_shapes: Optional[dict] = None
+
+    def __init__(self, canvas: tk.Canvas):
+        super().__init__(canvas)
+        # the turtle module keeps shapes per screen, so hand every hosted
+        # screen the registry of the first one
+        if HostedScreen.__shared_shapes is None:
+            HostedScreen.__shared_shapes = self._shapes
+        else:
+            self._shapes = HostedScreen.__shared_shapes
+
+    def _update(self):
+        # TurtleScreen would force a full Tk update here on every redraw
+        pass